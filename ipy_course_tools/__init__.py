@@ -2,3 +2,10 @@ from ipy_course_tools.formula import *
 
 __version__ = "0.1.13"  #: the working version
 __release__ = "0.1.13"  #: the release version
+
+
+def load_ipython_extension(ipython):
+    """Register the IPython magics of this package, see ipy_course_tools.magics."""
+    from ipy_course_tools.magics import load_ipython_extension
+
+    load_ipython_extension(ipython)
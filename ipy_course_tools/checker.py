@@ -0,0 +1,556 @@
+"""Answer-equivalence checks for grading submitted expressions, vectors and matrices.
+
+Answers are first compared numerically at random sample points, which settles almost
+every case in a fraction of the time of a symbolic comparison. Exact symbolic checks are
+only run when the numeric test is inconclusive, e.g. when the expressions cannot be
+evaluated at enough of the sample points.
+"""
+
+import multiprocessing
+import random
+import signal
+import threading
+
+from sympy import (
+    Expr,
+    Float,
+    Matrix,
+    MatrixBase,
+    Rational,
+    lambdify,
+    nsimplify,
+    simplify,
+)
+from sympy.core.sympify import SympifyError
+
+from ipy_course_tools.parsing import parse_expression
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is optional, mpmath ships with sympy
+    numpy = None
+
+CHECK_KINDS = (
+    "expression",
+    "linear_hull",
+    "affine_hull",
+    "convex_hull",
+    "scaled_basis",
+)
+
+
+def _to_sympy(obj):
+    if isinstance(obj, MatrixBase):
+        return obj
+    # answers are untrusted, never hand them to sympify
+    obj = parse_expression(obj)
+    # relations, booleans etc. parse fine but are no answers
+    if not all(isinstance(e, (Expr, MatrixBase)) for e in _leaves(obj)):
+        raise TypeError(f"Not an expression or matrix: {obj!r}")
+    if isinstance(obj, (list, tuple)):
+        return Matrix(obj)
+    return obj
+
+
+def _leaves(obj):
+    if isinstance(obj, (list, tuple)):
+        return [leaf for item in obj for leaf in _leaves(item)]
+    return [obj]
+
+
+def _entries(expr):
+    if isinstance(expr, MatrixBase):
+        return list(expr)
+    return [expr]
+
+
+def _sample_points(symbols, samples, seed):
+    rng = random.Random(seed)
+    return [[rng.uniform(-2.0, 2.0) for _ in range(samples)] for _ in symbols]
+
+
+def _numeric_values(symbols, entries, points):
+    """Evaluate entries at all sample points at once, one row per entry and point."""
+    samples = len(points[0]) if points else 1
+    if numpy is not None:
+        func = lambdify(symbols, entries, "numpy")
+        with numpy.errstate(all="ignore"):
+            values = func(*[numpy.asarray(p, dtype=complex) for p in points])
+        return numpy.array(
+            [
+                numpy.broadcast_to(numpy.asarray(v, dtype=complex), (samples,))
+                for v in values
+            ]
+        )
+
+    func = lambdify(symbols, entries, "mpmath")
+    columns = [func(*[p[k] for p in points]) for k in range(samples)]
+    return [[complex(column[i]) for column in columns] for i in range(len(entries))]
+
+
+def _is_close(a, b, rtol, atol):
+    return abs(a - b) <= atol + rtol * abs(b)
+
+
+def numeric_equivalence(answer, reference, samples=8, rtol=1e-9, atol=1e-12, seed=0):
+    """Compare two expressions or matrices numerically at random sample points.
+
+    Sample values are drawn for every free symbol and both sides are evaluated at all
+    points at once (vectorized with numpy where available, otherwise with mpmath). A
+    mismatch is double-checked at 30 significant digits before it is reported, so
+    round-off alone never fails an answer.
+
+    Args:
+        answer (sympy expression or Matrix): Submitted answer.
+        reference (sympy expression or Matrix): Reference answer.
+        samples (int, optional): Number of random sample points. Defaults to 8.
+        rtol (float, optional): Relative tolerance of the comparison. Defaults to 1e-9.
+        atol (float, optional): Absolute tolerance of the comparison. Defaults to 1e-12.
+        seed (int, optional): Seed of the sample points. Defaults to 0.
+
+    Returns:
+        [bool or None]: True or False if the test is conclusive, None otherwise.
+    """
+    answer_entries = _entries(answer)
+    reference_entries = _entries(reference)
+    if len(answer_entries) != len(reference_entries):
+        return False
+
+    symbols = sorted(
+        set().union(*(e.free_symbols for e in answer_entries + reference_entries)),
+        key=lambda s: s.name,
+    )
+    points = _sample_points(symbols, samples, seed)
+    count = len(answer_entries)
+    try:
+        values = _numeric_values(symbols, answer_entries + reference_entries, points)
+    except Exception:  # functions without a numeric implementation, etc.
+        return None
+
+    valid = 0
+    for k in range(samples if symbols else 1):
+        column = [values[i][k] for i in range(2 * count)]
+        if not all(v == v and abs(v) != float("inf") for v in column):
+            continue
+        valid += 1
+        if all(
+            _is_close(column[i], column[count + i], rtol, atol) for i in range(count)
+        ):
+            continue
+        subs = {s: p[k] for s, p in zip(symbols, points)}
+        for a, b in zip(answer_entries, reference_entries):
+            difference = complex((a - b).evalf(30, subs=subs))
+            if abs(difference) > atol + rtol * abs(complex(b.evalf(30, subs=subs))):
+                return False
+        return None
+
+    if valid * 2 < (samples if symbols else 1):
+        return None
+    return True
+
+
+def is_exact(expr):
+    """Whether an expression or matrix is free of floating point numbers.
+
+    Args:
+        expr (sympy expression or Matrix): Expression to inspect.
+
+    Returns:
+        bool: True if all numbers in it are exact, e.g. integers, rationals and
+            constants like pi.
+    """
+    return not any(e.has(Float) for e in _entries(expr))
+
+
+def exact_equivalence(answer, reference, samples=2, seed=0):
+    """Compare two exact expressions or matrices without any tolerance.
+
+    Differences without free symbols are compared exactly. Otherwise random rational
+    values are substituted for the free symbols and the resulting numbers are compared
+    exactly, so e.g. x and x + 10**-11 never agree, however close they are numerically.
+
+    Args:
+        answer (sympy expression or Matrix): Submitted answer, see is_exact.
+        reference (sympy expression or Matrix): Reference answer, see is_exact.
+        samples (int, optional): Number of random rational points. Defaults to 2.
+        seed (int, optional): Seed of the sample points. Defaults to 0.
+
+    Returns:
+        [bool or None]: True or False if the test is conclusive, None otherwise.
+    """
+    answer_entries = _entries(answer)
+    reference_entries = _entries(reference)
+    if len(answer_entries) != len(reference_entries):
+        return False
+
+    rng = random.Random(seed)
+    for a, b in zip(answer_entries, reference_entries):
+        difference = a - b
+        if difference == 0:
+            continue
+        symbols = sorted(difference.free_symbols, key=lambda s: s.name)
+        for _ in range(samples if symbols else 1):
+            point = {
+                s: Rational(rng.randint(-2000, 2000), rng.randint(1, 1000))
+                for s in symbols
+            }
+            value = difference.subs(point) if point else difference
+            if value.is_Rational:
+                zero = value == 0
+            elif not value.is_finite:
+                return None
+            else:
+                zero = value.equals(0)
+            if zero is None:
+                return None
+            if not zero:
+                return False
+    return True
+
+
+def symbolic_equivalence(answer, reference):
+    """Compare two expressions or matrices exactly with sympy.
+
+    Args:
+        answer (sympy expression or Matrix): Submitted answer.
+        reference (sympy expression or Matrix): Reference answer.
+
+    Returns:
+        bool: Whether the difference simplifies to zero.
+    """
+    if isinstance(answer, MatrixBase) != isinstance(reference, MatrixBase):
+        return False
+    if isinstance(answer, MatrixBase):
+        if answer.shape != reference.shape:
+            return False
+        return all(simplify(a - b) == 0 for a, b in zip(answer, reference))
+    return simplify(answer - reference) == 0
+
+
+def expressions_equivalent(answer, reference, samples=8, rtol=1e-9, atol=1e-12, seed=0):
+    """Check whether a submitted expression, vector or matrix equals the reference.
+
+    A fast numeric test at random sample points rejects most wrong answers. Answers that
+    pass it are compared exactly when neither side contains floating point numbers, see
+    exact_equivalence, and within the given tolerances otherwise.
+
+    Args:
+        answer (sympy expression, Matrix, list or string): Submitted answer. Strings are
+            parsed with parse_expression, lists become matrices.
+        reference (sympy expression, Matrix, list or string): Reference answer, same
+            conventions as the answer.
+        samples (int, optional): Number of random sample points of the numeric test.
+            Defaults to 8.
+        rtol (float, optional): Relative tolerance of the numeric test, used for
+            floating point answers. Defaults to 1e-9.
+        atol (float, optional): Absolute tolerance of the numeric test, used for
+            floating point answers. Defaults to 1e-12.
+        seed (int, optional): Seed of the sample points. Defaults to 0.
+
+    Returns:
+        bool: Whether the answer is equivalent to the reference.
+    """
+    try:
+        answer = _to_sympy(answer)
+    except (SympifyError, TypeError, ValueError):
+        return False
+    reference = _to_sympy(reference)
+
+    if isinstance(answer, MatrixBase) != isinstance(reference, MatrixBase):
+        return False
+    if isinstance(answer, MatrixBase) and answer.shape != reference.shape:
+        return False
+
+    result = numeric_equivalence(answer, reference, samples, rtol, atol, seed)
+    # tolerances only make sense for floating point answers, exact ones must agree
+    if result is not False and is_exact(answer) and is_exact(reference):
+        result = exact_equivalence(answer, reference, seed=seed)
+    if result is not None:
+        return result
+    return symbolic_equivalence(answer, reference)
+
+
+def _vectors(items):
+    # the rank and convex hull tests are exact, so decimals are taken at face value
+    return [nsimplify(Matrix(_to_sympy(v)).vec(), rational=True) for v in items]
+
+
+def _contains(spanning, vectors):
+    base = Matrix.hstack(*spanning)
+    return base.rank() == Matrix.hstack(base, *vectors).rank()
+
+
+def linear_hulls_equal(answer, reference):
+    """Check whether two spanning sets span the same linear subspace.
+
+    Args:
+        answer (list of vectors): Submitted spanning set, vectors as Matrix, list or
+            string.
+        reference (list of vectors): Reference spanning set.
+
+    Returns:
+        bool: Whether the linear hulls agree.
+    """
+    try:
+        answer = _vectors(answer)
+    except (SympifyError, TypeError, ValueError):
+        return False
+    reference = _vectors(reference)
+    if not answer or not reference:
+        return not any(v.norm() != 0 for v in answer + reference)
+    if answer[0].shape != reference[0].shape:
+        return False
+
+    return _contains(answer, reference) and _contains(reference, answer)
+
+
+def affine_hulls_equal(answer, reference):
+    """Check whether two point sets span the same affine subspace.
+
+    Args:
+        answer (list of vectors): Submitted points, vectors as Matrix, list or string.
+        reference (list of vectors): Reference points.
+
+    Returns:
+        bool: Whether the affine hulls agree.
+    """
+    try:
+        answer = _vectors(answer)
+    except (SympifyError, TypeError, ValueError):
+        return False
+    reference = _vectors(reference)
+    if not answer or not reference:
+        return not answer and not reference
+    if answer[0].shape != reference[0].shape:
+        return False
+
+    # each point set has to lie in the affine hull of the other one
+    return _contains(
+        [v - reference[0] for v in reference], [v - reference[0] for v in answer]
+    ) and _contains([v - answer[0] for v in answer], [v - answer[0] for v in reference])
+
+
+def _nonnegative_solution_exists(rows, rhs):
+    """Whether rows * w == rhs has a solution w >= 0.
+
+    Decided by phase one of the simplex method in exact arithmetic, with Bland's rule so
+    it always terminates: artificial variables are added as the initial basis and their
+    sum is minimised.
+    """
+    m, n = len(rows), len(rows[0])
+    tableau = []
+    for i, (row, value) in enumerate(zip(rows, rhs)):
+        sign = -1 if value < 0 else 1
+        artificial = [1 if k == i else 0 for k in range(m)]
+        tableau.append([sign * x for x in row] + artificial + [sign * value])
+    basis = [n + i for i in range(m)]
+
+    while True:
+        artificial_rows = [i for i in range(m) if basis[i] >= n]
+        entering = next(
+            (
+                j
+                for j in range(n + m)
+                if (1 if j >= n else 0) - sum(tableau[i][j] for i in artificial_rows)
+                < 0
+            ),
+            None,
+        )
+        if entering is None:
+            return all(tableau[i][-1] == 0 for i in artificial_rows)
+        candidates = [i for i in range(m) if tableau[i][entering] > 0]
+        leaving = min(
+            candidates, key=lambda i: (tableau[i][-1] / tableau[i][entering], basis[i])
+        )
+        pivot = tableau[leaving][entering]
+        tableau[leaving] = [x / pivot for x in tableau[leaving]]
+        for i in range(m):
+            if i != leaving and tableau[i][entering] != 0:
+                factor = tableau[i][entering]
+                tableau[i] = [
+                    x - factor * y for x, y in zip(tableau[i], tableau[leaving])
+                ]
+        basis[leaving] = entering
+
+
+def _in_convex_hull(point, points):
+    """Whether a point is a convex combination of the given points."""
+    # weights w >= 0 with sum(w_i p_i) == point and sum(w) == 1
+    rows = [[p[k] for p in points] for k in range(len(point))] + [[1] * len(points)]
+    return _nonnegative_solution_exists(rows, list(point) + [1])
+
+
+def convex_hulls_equal(answer, reference):
+    """Check whether two point sets have the same convex hull.
+
+    The hulls agree if every point of each set is a convex combination of the points of
+    the other one, so extra points inside the hull, repetitions and order do not matter.
+    The coordinates have to be numbers, answers with symbolic coordinates are rejected.
+    Decimals are replaced by the fractions they denote, e.g. 0.1 by 1/10.
+
+    Args:
+        answer (list of vectors): Submitted points, vectors as Matrix, list or string.
+        reference (list of vectors): Reference points.
+
+    Returns:
+        bool: Whether the convex hulls agree.
+    """
+    try:
+        answer = _vectors(answer)
+    except (SympifyError, TypeError, ValueError):
+        return False
+    reference = _vectors(reference)
+    if not answer or not reference:
+        return not answer and not reference
+    if answer[0].shape != reference[0].shape:
+        return False
+
+    try:
+        return all(_in_convex_hull(a, reference) for a in answer) and all(
+            _in_convex_hull(r, answer) for r in reference
+        )
+    except TypeError:  # symbolic coordinates cannot be compared
+        return False
+
+
+def _parallel(u, v):
+    # the zero vector is a multiple of everything, but never a basis vector
+    if u.shape != v.shape or u.is_zero_matrix or v.is_zero_matrix:
+        return False
+    return Matrix.hstack(u, v).rank() == 1
+
+
+def scaled_bases_equal(answer, reference):
+    """Check whether two bases agree up to the order and scaling of their vectors.
+
+    This is the natural comparison of eigenvector bases, where every eigenvector is only
+    determined up to a non-zero scalar factor.
+
+    Args:
+        answer (list of vectors): Submitted basis, vectors as Matrix, list or string.
+        reference (list of vectors): Reference basis.
+
+    Returns:
+        bool: Whether every answer vector is a non-zero multiple of a distinct reference
+            vector.
+    """
+    try:
+        answer = _vectors(answer)
+    except (SympifyError, TypeError, ValueError):
+        return False
+    reference = _vectors(reference)
+    if len(answer) != len(reference):
+        return False
+
+    unmatched = list(reference)
+    for vector in answer:
+        for i, candidate in enumerate(unmatched):
+            if _parallel(vector, candidate):
+                del unmatched[i]
+                break
+        else:
+            return False
+    return True
+
+
+_CHECKS = {
+    "expression": expressions_equivalent,
+    "linear_hull": linear_hulls_equal,
+    "affine_hull": affine_hulls_equal,
+    "convex_hull": convex_hulls_equal,
+    "scaled_basis": scaled_bases_equal,
+}
+
+
+def check_answer(answer, reference, kind="expression", **kwargs):
+    """Check a single submitted answer against its reference.
+
+    Args:
+        answer: Submitted answer.
+        reference: Reference answer.
+        kind (str, optional): Kind of the answer, one of CHECK_KINDS.
+            Defaults to "expression".
+        **kwargs: Passed on to the check of the given kind.
+
+    Returns:
+        bool: Whether the answer is accepted.
+    """
+    if kind not in _CHECKS:
+        raise ValueError(f"Unknown answer kind: {kind}")
+    return _CHECKS[kind](answer, reference, **kwargs)
+
+
+class _CheckTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _CheckTimeout()
+
+
+def _check(answer, reference, kind, kwargs):
+    # one broken item must not discard the results of the whole batch
+    try:
+        return check_answer(answer, reference, kind, **kwargs)
+    except _CheckTimeout:
+        raise
+    except Exception:
+        return None
+
+
+def _check_task(task):
+    answer, reference, kind, timeout, kwargs = task
+    if (
+        timeout is None
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        return _check(answer, reference, kind, kwargs)
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _check(answer, reference, kind, kwargs)
+    except _CheckTimeout:
+        return None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def check_batch(
+    submissions, kind="expression", processes=None, timeout=5.0, chunksize=16, **kwargs
+):
+    """Check a batch of submitted answers in parallel.
+
+    Every check is interrupted after the given timeout (on platforms with interval
+    timers), so a single pathological submission cannot stall the batch. A check that
+    raises, e.g. for an unusable reference, gives None for its item only.
+
+    Args:
+        submissions (iterable of tuples): (answer, reference) pairs.
+        kind (str, optional): Kind of the answers, one of CHECK_KINDS.
+            Defaults to "expression".
+        processes (int, optional): Size of the process pool. 1 checks in the current
+            process, None uses all cores. Defaults to None.
+        timeout (float, optional): Per-item timeout in seconds, None disables it.
+            Defaults to 5.0.
+        chunksize (int, optional): Number of submissions handed to a worker at once.
+            Defaults to 16.
+        **kwargs: Passed on to the check of the given kind.
+
+    Returns:
+        list: True or False per submission, or None where the check timed out or
+            failed.
+    """
+    if kind not in _CHECKS:
+        raise ValueError(f"Unknown answer kind: {kind}")
+
+    tasks = [
+        (answer, reference, kind, timeout, kwargs) for answer, reference in submissions
+    ]
+    if processes == 1:
+        return [_check_task(task) for task in tasks]
+
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_check_task, tasks, chunksize=chunksize)
@@ -0,0 +1,163 @@
+"""Minimal equivalent LaTeX for the compact output mode.
+
+The helpers of this package, and sympy's printer underneath, emit verbose LaTeX:
+redundant whitespace and braces, and full \\left[\\begin{matrix} wrappers. The functions
+here rewrite such LaTeX into a shorter form that typesets the same way. Sized \\left and
+\\right delimiters are kept even around single-line content, since they make an inner
+atom, which is spaced differently from plain brackets.
+"""
+
+import hashlib
+import re
+
+#: commands whose argument is typeset as text, where whitespace is significant
+_TEXT_COMMANDS = re.compile(r"\\(?:text[a-z]*|mbox)\s*\{")
+
+_MATRIX_DELIMITERS = {
+    "\\left[\\begin{matrix}": "\\begin{bmatrix}",
+    "\\end{matrix}\\right]": "\\end{bmatrix}",
+    "\\left(\\begin{matrix}": "\\begin{pmatrix}",
+    "\\end{matrix}\\right)": "\\end{pmatrix}",
+}
+_MATRIX_PATTERN = re.compile("|".join(re.escape(k) for k in _MATRIX_DELIMITERS))
+
+_SINGLE_BRACED = re.compile(r"(?<!\\)([_^])\{([A-Za-z0-9])\}")
+
+_BMATRIX = re.compile(
+    r"\\begin\{bmatrix\}(?:(?!\\begin\{bmatrix\}).)*?\\end\{bmatrix\}", re.S
+)
+
+#: minimum length of a fragment worth sharing through a macro
+MACRO_MIN_LENGTH = 24
+
+
+def _group_end(text, start):
+    """Index just past the brace group opening at text[start - 1]."""
+    depth = 1
+    i = start
+    while i < len(text) and depth:
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == "{":
+            depth += 1
+        elif text[i] == "}":
+            depth -= 1
+        i += 1
+    return i
+
+
+def squeeze_whitespace(latex):
+    """Remove whitespace that is ignored in math mode.
+
+    A single space is kept where it terminates a control word before a letter, after a
+    line break command before "[" or "*", and everything inside text arguments is kept
+    verbatim.
+
+    Args:
+        latex (str): LaTeX source.
+
+    Returns:
+        str: LaTeX source without redundant whitespace.
+    """
+    out = []
+    i = 0
+    n = len(latex)
+    while i < n:
+        match = _TEXT_COMMANDS.match(latex, i)
+        if match:
+            end = _group_end(latex, match.end())
+            out.append(latex[i:end])
+            i = end
+            continue
+
+        char = latex[i]
+        if char == "\\":
+            j = i + 1
+            while j < n and latex[j].isalpha():
+                j += 1
+            if j == i + 1:
+                j = min(i + 2, n)
+            out.append(latex[i:j])
+            i = j
+            continue
+
+        if char.isspace():
+            j = i
+            while j < n and latex[j].isspace():
+                j += 1
+            previous = "".join(out[-1:])
+            following = latex[j] if j < n else ""
+            control_word = previous.startswith("\\") and previous[-1:].isalpha()
+            if (control_word and following.isalpha()) or (
+                previous == "\\\\" and following in ("[", "*")
+            ):
+                out.append(" ")
+            i = j
+            continue
+
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def compact_latex(latex):
+    """Rewrite LaTeX into a shorter form that typesets the same way.
+
+    Matrix wrappers become bmatrix and pmatrix environments, single characters lose the
+    braces around their sub- and superscripts, and whitespace ignored in math mode is
+    removed.
+
+    Args:
+        latex (str): LaTeX source, as produced by the helpers of this package.
+
+    Returns:
+        str: The compacted LaTeX source.
+    """
+    latex = _MATRIX_PATTERN.sub(lambda m: _MATRIX_DELIMITERS[m.group(0)], latex)
+    latex = squeeze_whitespace(latex)
+    return _SINGLE_BRACED.sub(r"\1\2", latex)
+
+
+def _macro_name(fragment):
+    digest = hashlib.sha256(fragment.encode("utf-8")).hexdigest()[:8]
+    return "\\ict" + "".join(chr(ord("a") + int(c, 16)) for c in digest)
+
+
+def share_macros(latex, min_length=MACRO_MIN_LENGTH):
+    """Replace repeated matrices by macros defined once at the start of the formula.
+
+    Macro names are derived from the content they stand for, so definitions emitted by
+    different outputs on the same page never conflict, even though MathJax keeps them
+    globally.
+
+    Args:
+        latex (str): Compacted LaTeX source of a complete formula.
+        min_length (int, optional): Minimum length of a matrix worth sharing. Defaults
+            to MACRO_MIN_LENGTH.
+
+    Returns:
+        str: LaTeX source with \\def definitions prepended, or the input if nothing is
+            worth sharing.
+    """
+    counts = {}
+    for match in _BMATRIX.finditer(latex):
+        fragment = match.group(0)
+        counts[fragment] = counts.get(fragment, 0) + 1
+
+    definitions = []
+    for fragment, count in counts.items():
+        name = _macro_name(fragment)
+        definition = f"\\def{name}{{{fragment}}}"
+        saved = count * (len(fragment) - len(name) - 2) - len(definition)
+        if count < 2 or len(fragment) < min_length or saved <= 0:
+            continue
+        # an empty group keeps a following letter from extending the macro name, it is
+        # only added there since it would take a following ^ or _ away from the matrix
+        latex = re.sub(
+            re.escape(fragment) + r"(?=([A-Za-z])?)",
+            lambda m: name + ("{}" if m.group(1) else ""),
+            latex,
+        )
+        definitions.append(definition)
+    return "".join(definitions) + latex
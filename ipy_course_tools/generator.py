@@ -0,0 +1,334 @@
+"""Seeded generation of per-student exercise variants.
+
+Every variant is derived from a base seed and its index only, so any variant can be
+regenerated on its own, and the output does not depend on how the work is split
+across processes.
+"""
+
+import json
+import multiprocessing
+import random
+
+from sympy import Matrix
+
+from ipy_course_tools.formula import (
+    eqn_align,
+    generate_parametric_poly,
+    linear_combination,
+    linear_hull,
+    show_eigenvects,
+    show_formula,
+    show_matrix,
+)
+
+EXERCISE_KINDS = ("eigen", "poly", "combination", "hull")
+
+
+def variant_rng(seed, index):
+    """Random number generator of a single variant.
+
+    Args:
+        seed (int or str): Base seed of the whole batch.
+        index (int): Index of the variant within the batch.
+
+    Returns:
+        random.Random: Generator seeded deterministically from seed and index.
+    """
+    return random.Random(f"{seed}:{index}")
+
+
+def unimodular_matrix(size, rng, steps=None, bound=1):
+    """Random integer matrix with determinant +1 or -1, together with its inverse.
+
+    The matrix is built as a product of random elementary row operations (row additions
+    with small integer multiples and row swaps). The inverse is tracked alongside by
+    applying the inverse operations as column operations, so no inversion is ever
+    computed.
+
+    Args:
+        size (int): Number of rows and columns.
+        rng (random.Random): Random number generator to draw from.
+        steps (int, optional): Number of elementary operations to apply.
+            Defaults to size + 1.
+        bound (int, optional): Largest absolute value of a row addition multiplier.
+            Defaults to 1.
+
+    Returns:
+        [tuple of list of lists]: The matrix and its inverse as nested lists of int.
+    """
+    if steps is None:
+        steps = size + 1
+    mat = [[int(i == j) for j in range(size)] for i in range(size)]
+    inv = [[int(i == j) for j in range(size)] for i in range(size)]
+    if size < 2:
+        return mat, inv
+
+    multipliers = [c for c in range(-bound, bound + 1) if c != 0]
+    for _ in range(steps):
+        i, j = rng.sample(range(size), 2)
+        if rng.random() < 0.2:
+            # R_i <-> R_j on the matrix, C_i <-> C_j on the inverse
+            mat[i], mat[j] = mat[j], mat[i]
+            for row in inv:
+                row[i], row[j] = row[j], row[i]
+        else:
+            # R_i + c R_j on the matrix, C_j - c C_i on the inverse
+            c = rng.choice(multipliers)
+            mat[i] = [a + c * b for a, b in zip(mat[i], mat[j])]
+            for row in inv:
+                row[j] -= c * row[i]
+    return mat, inv
+
+
+def matrix_with_eigenvalues(eigenvalues, rng, **kwargs):
+    """Random integer matrix with a prescribed spectrum.
+
+    The matrix is assembled directly as P * D * P^-1 with a unimodular P, so it has
+    integer entries, the given eigenvalues and the columns of P as eigenvectors. No
+    rejection sampling is involved.
+
+    Args:
+        eigenvalues (list of int): Eigenvalues, repeated according to their
+            multiplicity.
+        rng (random.Random): Random number generator to draw from.
+        **kwargs: Passed on to unimodular_matrix.
+
+    Returns:
+        [tuple of list of lists]: The matrix and P as nested lists of int.
+    """
+    size = len(eigenvalues)
+    p, p_inv = unimodular_matrix(size, rng, **kwargs)
+    pd = [[p[i][k] * eigenvalues[k] for k in range(size)] for i in range(size)]
+    mat = [
+        [sum(pd[i][k] * p_inv[k][j] for k in range(size)) for j in range(size)]
+        for i in range(size)
+    ]
+    return mat, p
+
+
+def eigen_variant(rng, sizes=(2, 3), value_range=(-5, 5)):
+    """Eigenvalue problem of a random integer matrix with integer eigenvalues.
+
+    Args:
+        rng (random.Random): Random number generator to draw from.
+        sizes (tuple of int, optional): Matrix sizes to choose from. Defaults to (2, 3).
+        value_range (tuple of int, optional): Inclusive range of the eigenvalues.
+            Defaults to (-5, 5).
+
+    Returns:
+        dict: Statement and solution LaTeX strings and the raw data of the variant.
+    """
+    size = rng.choice(sizes)
+    eigenvalues = sorted(rng.randint(*value_range) for _ in range(size))
+    mat, p = matrix_with_eigenvalues(eigenvalues, rng)
+
+    # group the columns of P by eigenvalue, in the layout of Matrix.eigenvects
+    eigenvect_list = []
+    for value in sorted(set(eigenvalues)):
+        columns = [k for k, v in enumerate(eigenvalues) if v == value]
+        vectors = [Matrix([p[i][k] for i in range(size)]) for k in columns]
+        eigenvect_list.append((value, len(columns), vectors))
+
+    return {
+        "statement": show_matrix("A", Matrix(mat)),
+        "solution": show_eigenvects("v", eigenvect_list, display=False),
+        "data": {
+            "matrix": mat,
+            "eigenvalues": eigenvalues,
+            "eigenvectors": [[row[k] for row in p] for k in range(size)],
+        },
+    }
+
+
+def poly_variant(rng, degrees=(2, 3, 4), coef_range=(-9, 9)):
+    """Instantiation of a parametric polynomial with random integer coefficients.
+
+    The statement gives the parametric polynomial together with the sampled coefficient
+    values, the solution is the polynomial with the values substituted.
+
+    Args:
+        rng (random.Random): Random number generator to draw from.
+        degrees (tuple of int, optional): Polynomial degrees to choose from.
+            Defaults to (2, 3, 4).
+        coef_range (tuple of int, optional): Inclusive range of the coefficients.
+            Defaults to (-9, 9).
+
+    Returns:
+        dict: Statement and solution LaTeX strings and the raw data of the variant.
+    """
+    degree = rng.choice(degrees)
+    poly = generate_parametric_poly(degree + 1)
+    coefs = [rng.randint(*coef_range) for _ in range(degree)]
+    coefs.append(rng.choice([c for c in range(coef_range[0], coef_range[1] + 1) if c]))
+    values = {f"a_{i}": c for i, c in enumerate(coefs)}
+    substitutions = {s: values[s.name] for s in poly.free_symbols if s.name in values}
+    assignments = ", \\quad ".join(
+        show_formula(f"a_{{{i}}}", c) for i, c in enumerate(coefs)
+    )
+
+    return {
+        "statement": eqn_align(
+            [show_formula("p(x)", poly, formula_align=True), f"& {assignments}"]
+        ),
+        "solution": show_formula("p(x)", poly.subs(substitutions)),
+        "data": {"coefficients": coefs},
+    }
+
+
+def combination_variant(rng, dims=(2, 3), terms=(2, 3), value_range=(-5, 5)):
+    """Evaluation of a linear combination of random integer vectors.
+
+    Args:
+        rng (random.Random): Random number generator to draw from.
+        dims (tuple of int, optional): Vector dimensions to choose from.
+            Defaults to (2, 3).
+        terms (tuple of int, optional): Numbers of terms to choose from.
+            Defaults to (2, 3).
+        value_range (tuple of int, optional): Inclusive range of coefficients and
+            entries. Defaults to (-5, 5).
+
+    Returns:
+        dict: Statement and solution LaTeX strings and the raw data of the variant.
+    """
+    dim = rng.choice(dims)
+    count = rng.choice(terms)
+    coefs = [rng.randint(*value_range) for _ in range(count)]
+    vectors = [[rng.randint(*value_range) for _ in range(dim)] for _ in range(count)]
+    result = [sum(c * v[i] for c, v in zip(coefs, vectors)) for i in range(dim)]
+    vector_mats = [Matrix(v) for v in vectors]
+
+    return {
+        "statement": linear_combination(coefs, vector_mats, None),
+        "solution": linear_combination(coefs, vector_mats, Matrix(result)),
+        "data": {"coefficients": coefs, "vectors": vectors, "result": result},
+    }
+
+
+def hull_variant(rng, dims=(3, 4), terms=(2, 3), value_range=(-3, 3)):
+    """Membership of a vector in the linear hull of random integer vectors.
+
+    The vector is built as an integer combination of the spanning vectors, and that
+    combination is the solution.
+
+    Args:
+        rng (random.Random): Random number generator to draw from.
+        dims (tuple of int, optional): Vector dimensions to choose from.
+            Defaults to (3, 4).
+        terms (tuple of int, optional): Numbers of spanning vectors to choose from.
+            Defaults to (2, 3).
+        value_range (tuple of int, optional): Inclusive range of coefficients and
+            entries. Defaults to (-3, 3).
+
+    Returns:
+        dict: Statement and solution LaTeX strings and the raw data of the variant.
+    """
+    dim = rng.choice(dims)
+    count = rng.choice(terms)
+    vectors = [[rng.randint(*value_range) for _ in range(dim)] for _ in range(count)]
+    coefs = [rng.randint(*value_range) for _ in range(count)]
+    target = [sum(c * v[i] for c, v in zip(coefs, vectors)) for i in range(dim)]
+    vector_mats = [Matrix(v) for v in vectors]
+
+    return {
+        "statement": linear_hull(
+            vector_mats, formula=Matrix(target), formula_op="\\in", formula_suffix=False
+        ),
+        "solution": linear_combination(coefs, vector_mats, Matrix(target)),
+        "data": {"vectors": vectors, "coefficients": coefs, "target": target},
+    }
+
+
+VARIANT_BUILDERS = {
+    "eigen": eigen_variant,
+    "poly": poly_variant,
+    "combination": combination_variant,
+    "hull": hull_variant,
+}
+
+
+def generate_variant(seed, index, kinds=EXERCISE_KINDS):
+    """Generate a single exercise variant.
+
+    Args:
+        seed (int or str): Base seed of the whole batch.
+        index (int): Index of the variant within the batch.
+        kinds (tuple of str, optional): Exercise kinds to choose from, see
+            EXERCISE_KINDS. Defaults to all of them.
+
+    Returns:
+        dict: JSON serialisable variant with index, seed, kind, statement, solution and
+            data keys.
+    """
+    rng = variant_rng(seed, index)
+    kind = rng.choice(kinds)
+    variant = {"index": index, "seed": seed, "kind": kind}
+    variant.update(VARIANT_BUILDERS[kind](rng))
+    return variant
+
+
+def _generate_task(task):
+    return generate_variant(*task)
+
+
+def generate_variants(
+    count, seed=0, kinds=EXERCISE_KINDS, processes=None, chunksize=64
+):
+    """Generate exercise variants, optionally across a process pool.
+
+    Variants are yielded in index order as they become available. The result is the same
+    for any number of processes.
+
+    Args:
+        count (int): Number of variants to generate.
+        seed (int or str, optional): Base seed of the batch. Defaults to 0.
+        kinds (tuple of str, optional): Exercise kinds to choose from, see
+            EXERCISE_KINDS. Defaults to all of them.
+        processes (int, optional): Size of the process pool. 1 generates in the current
+            process, None uses all cores. Defaults to None.
+        chunksize (int, optional): Number of variants handed to a worker at once.
+            Defaults to 64.
+
+    Yields:
+        dict: The variants, see generate_variant.
+    """
+    unknown = set(kinds) - set(VARIANT_BUILDERS)
+    if unknown:
+        raise ValueError(f"Unknown exercise kinds: {sorted(unknown)}")
+
+    tasks = ((seed, index, tuple(kinds)) for index in range(count))
+    if processes == 1:
+        yield from map(_generate_task, tasks)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(_generate_task, tasks, chunksize=chunksize)
+
+
+def write_variants(
+    path, count, seed=0, kinds=EXERCISE_KINDS, processes=None, chunksize=64
+):
+    """Generate exercise variants and stream them to a JSON Lines file.
+
+    Args:
+        path (str or file object): Output file path, or an open text file to write to.
+        count (int): Number of variants to generate.
+        seed (int or str, optional): Base seed of the batch. Defaults to 0.
+        kinds (tuple of str, optional): Exercise kinds to choose from, see
+            EXERCISE_KINDS. Defaults to all of them.
+        processes (int, optional): Size of the process pool, see generate_variants.
+            Defaults to None.
+        chunksize (int, optional): Number of variants handed to a worker at once.
+            Defaults to 64.
+
+    Returns:
+        int: Number of variants written.
+    """
+    if isinstance(path, str):
+        with open(path, "w") as f:
+            return write_variants(f, count, seed, kinds, processes, chunksize)
+
+    written = 0
+    for variant in generate_variants(count, seed, kinds, processes, chunksize):
+        path.write(json.dumps(variant) + "\n")
+        written += 1
+    return written
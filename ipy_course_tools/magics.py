@@ -0,0 +1,81 @@
+"""IPython extension batching all formula output of a cell into a single display.
+
+Load it with ``%load_ext ipy_course_tools`` and start a cell with ``%%formulas``. Every
+helper called with display=True in that cell is collected instead of being shown on its
+own, and all of them are shown together as one align environment when the cell finishes,
+so MathJax only typesets once. In plain scripts the collect_formulas context manager
+does the same.
+"""
+
+import contextlib
+
+from IPython.core.magic import Magics, cell_magic, magics_class
+from IPython.display import display as ipython_display
+
+from ipy_course_tools.renderer import _current_collector, get_renderer
+
+_ALIGN_START = "\\begin{align}"
+_ALIGN_END = "\\end{align}"
+
+
+def combine_formulas(formulas, display=True):
+    """Combine formulas into the rows of one align environment.
+
+    Formulas that already are align environments, e.g. from eqn_align, contribute their
+    rows.
+
+    Args:
+        formulas (list of str): LaTeX sources of the formulas.
+        display (bool, optional): If False, returns LaTeX string output. If True,
+            returns the rendering of the current renderer. Defaults to True.
+
+    Returns:
+        [str or Math render]: Either LaTeX string or IPython rendering thereof.
+    """
+    rows = []
+    for text in formulas:
+        text = text.strip()
+        if text.startswith(_ALIGN_START) and text.endswith(_ALIGN_END):
+            text = text[len(_ALIGN_START) : -len(_ALIGN_END)].strip()
+        rows.append(text)
+    return get_renderer().eqn_align(rows, display=display)
+
+
+@contextlib.contextmanager
+def collect_formulas(display=True):
+    """Collect the formulas displayed within a with block and show them together at its
+    end.
+
+    Args:
+        display (bool, optional): Whether to display the combined formulas when the
+            block ends. Defaults to True.
+
+    Yields:
+        list of str: The LaTeX sources collected so far, e.g. for combine_formulas(...,
+            display=False).
+    """
+    formulas = []
+    token = _current_collector.set(formulas)
+    try:
+        yield formulas
+    finally:
+        _current_collector.reset(token)
+        if display and formulas:
+            ipython_display(combine_formulas(formulas))
+
+
+@magics_class
+class FormulaMagics(Magics):
+    """Magics of ipy_course_tools."""
+
+    @cell_magic
+    def formulas(self, line, cell):
+        """Run the cell and show all formulas it displays as a single align
+        environment."""
+        with collect_formulas():
+            self.shell.run_cell(cell, store_history=False)
+
+
+def load_ipython_extension(ipython):
+    """Register the %%formulas cell magic."""
+    ipython.register_magics(FormulaMagics)
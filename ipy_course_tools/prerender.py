@@ -0,0 +1,316 @@
+"""Batch pre-rendering of the formulas of whole course directories.
+
+Run with::
+
+    python -m ipy_course_tools.prerender course/ --jobs 8
+
+Every notebook that calls the helpers of this package is executed once in a worker
+process whose default renderer is switched to "svg" output mode, so every formula it
+displays is typeset into the shared SVG cache, see ipy_course_tools.svg. Settings the
+notebook changes itself, e.g. with set_compact or set_output_mode, apply just like in a
+kernel, so kernels that later run the notebooks in "svg" mode find all their formulas in
+the cache. A manifest in the cache directory records a content hash of every notebook's
+code and of the render settings, so notebooks whose inputs have not changed are skipped
+on the next run.
+"""
+
+import argparse
+import ast
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+
+from ipy_course_tools.renderer import HELPERS, default_renderer
+from ipy_course_tools.svg import default_backend, default_cache_dir
+
+MANIFEST_NAME = "prerender.json"
+
+
+def find_notebooks(root):
+    """All notebooks below a directory, skipping checkpoint copies.
+
+    Args:
+        root (str): Directory to scan, or a single notebook.
+
+    Returns:
+        list of str: Sorted notebook paths.
+    """
+    if os.path.isfile(root):
+        return [root]
+    notebooks = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d != ".ipynb_checkpoints"]
+        notebooks.extend(
+            os.path.join(dirpath, f) for f in filenames if f.endswith(".ipynb")
+        )
+    return sorted(notebooks)
+
+
+def notebook_sources(path):
+    """Sources of the code cells of a notebook.
+
+    Args:
+        path (str): Notebook path.
+
+    Returns:
+        list of str: Source of every code cell, in order.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        notebook = json.load(f)
+    sources = []
+    for cell in notebook.get("cells", []):
+        if cell.get("cell_type") == "code":
+            source = cell.get("source", "")
+            sources.append("".join(source) if isinstance(source, list) else source)
+    return sources
+
+
+def helper_calls(sources):
+    """Names of the helpers of this package a notebook calls.
+
+    Cells are parsed after IPython syntax (magics, shell escapes) has been translated to
+    Python, and calls are matched by the name of the called function or method.
+
+    Args:
+        sources (list of str): Code cell sources.
+
+    Returns:
+        set of str: Called helper names, empty if the notebook does not import this
+            package.
+    """
+    from IPython.core.inputtransformer2 import TransformerManager
+
+    transformer = TransformerManager()
+    imports_package = False
+    calls = set()
+    for source in sources:
+        try:
+            tree = ast.parse(transformer.transform_cell(source))
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                imports_package |= any(
+                    a.name.split(".")[0] == "ipy_course_tools" for a in node.names
+                )
+            elif isinstance(node, ast.ImportFrom):
+                imports_package |= (node.module or "").split(".")[
+                    0
+                ] == "ipy_course_tools"
+            elif isinstance(node, ast.Call):
+                func = node.func
+                name = (
+                    func.id
+                    if isinstance(func, ast.Name)
+                    else getattr(func, "attr", None)
+                )
+                if name in HELPERS:
+                    calls.add(name)
+    return calls if imports_package else set()
+
+
+def notebook_hash(sources, settings):
+    """Content hash of a notebook's code and the render settings.
+
+    Args:
+        sources (list of str): Code cell sources.
+        settings (dict): JSON serialisable render settings.
+
+    Returns:
+        str: Hex digest.
+    """
+    from ipy_course_tools import __version__
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps([__version__, settings], sort_keys=True).encode("utf-8"))
+    for source in sources:
+        digest.update(b"\0" + source.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_manifest(cache_dir):
+    """Notebook hashes recorded by the last run.
+
+    Args:
+        cache_dir (str): Cache directory.
+
+    Returns:
+        dict: Notebook hash by absolute notebook path.
+    """
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(cache_dir, manifest):
+    """Record notebook hashes for the next run.
+
+    Args:
+        cache_dir (str): Cache directory.
+        manifest (dict): Notebook hash by absolute notebook path.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+_shell = None
+
+
+def _get_shell():
+    global _shell
+    if _shell is None:
+        from IPython.core.interactiveshell import InteractiveShell
+
+        import ipy_course_tools
+
+        _shell = InteractiveShell.instance()
+        ipy_course_tools.load_ipython_extension(_shell)
+    return _shell
+
+
+def prerender_notebook(task):
+    """Execute a notebook's code cells and render every displayed formula into the SVG
+    cache.
+
+    The default renderer of the worker process is reset to "svg" output mode with the
+    given backend and cache directory, and otherwise default settings, before the
+    notebook runs.
+
+    Args:
+        task (tuple): Notebook path, its code cell sources, SVG backend and cache
+            directory.
+
+    Returns:
+        dict: Notebook path, seconds taken, number of formulas displayed by the default
+            renderer and number of failed cells.
+    """
+    path, sources, backend, cache_dir = task
+    start = time.perf_counter()
+    shell = _get_shell()
+    shell.reset(new_session=False)
+    default_renderer.set_output_mode("svg", backend=backend, cache_dir=cache_dir)
+    default_renderer.set_compact(False)
+    default_renderer.reset_stats()
+
+    failed = 0
+    cwd = os.getcwd()
+    sink = io.StringIO()
+    try:
+        os.chdir(os.path.dirname(os.path.abspath(path)))
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            for source in sources:
+                result = shell.run_cell(source, store_history=False, silent=True)
+                if not result.success:
+                    failed += 1
+    finally:
+        os.chdir(cwd)
+
+    return {
+        "path": path,
+        "seconds": time.perf_counter() - start,
+        "formulas": default_renderer.stats()["displays"],
+        "failed_cells": failed,
+    }
+
+
+def prerender(
+    roots, cache_dir=None, backend=None, jobs=None, force=False, report=print
+):
+    """Pre-render the formulas of all notebooks below the given directories.
+
+    Args:
+        roots (list of str): Directories or notebooks to scan.
+        cache_dir (str, optional): Shared render cache. Defaults to the default SVG
+            cache directory.
+        backend (str, optional): SVG backend, one of SVG_BACKENDS.
+            Defaults to default_backend().
+        jobs (int, optional): Number of worker processes. Defaults to None, one per
+            core.
+        force (bool, optional): Whether to render unchanged notebooks too.
+            Defaults to False.
+        report (callable, optional): Called with one line of text per notebook and a
+            summary. Defaults to print.
+
+    Returns:
+        list of dict: Result per notebook with path, status ("rendered", "failed",
+            "unchanged" or "no formulas"), seconds, formulas and failed_cells.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    backend = backend or default_backend()
+    settings = {"backend": backend}
+    manifest = load_manifest(cache_dir)
+
+    results = []
+    tasks = []
+    hashes = {}
+    for path in (nb for root in roots for nb in find_notebooks(root)):
+        key = os.path.abspath(path)
+        sources = notebook_sources(path)
+        hashes[key] = notebook_hash(sources, settings)
+        if not helper_calls(sources):
+            results.append({"path": path, "status": "no formulas"})
+        elif not force and manifest.get(key) == hashes[key]:
+            results.append({"path": path, "status": "unchanged"})
+        else:
+            tasks.append((path, sources, backend, cache_dir))
+
+    for result in results:
+        report(f"{'':>8}  {result['status']:<12} {result['path']}")
+
+    start = time.perf_counter()
+    if tasks:
+        with multiprocessing.Pool(min(jobs or os.cpu_count() or 1, len(tasks))) as pool:
+            for result in pool.imap_unordered(prerender_notebook, tasks):
+                key = os.path.abspath(result["path"])
+                if result["failed_cells"]:
+                    result["status"] = "failed"
+                    manifest.pop(key, None)
+                else:
+                    result["status"] = "rendered"
+                    manifest[key] = hashes[key]
+                save_manifest(cache_dir, manifest)
+                results.append(result)
+                report(
+                    f"{result['seconds']:>7.2f}s  {result['status']:<12} "
+                    f"{result['path']} ({result['formulas']} formulas, "
+                    f"{result['failed_cells']} failed cells)"
+                )
+
+    rendered = [r for r in results if r["status"] in ("rendered", "failed")]
+    report(
+        f"{len(rendered)} of {len(results)} notebooks rendered in "
+        f"{time.perf_counter() - start:.2f}s, "
+        f"{sum(r['formulas'] for r in rendered)} formulas, cache in {cache_dir}"
+    )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ipy_course_tools.prerender",
+        description="Pre-render the formulas of notebooks into the shared SVG cache.",
+    )
+    parser.add_argument("roots", nargs="+", help="directories or notebooks to scan")
+    parser.add_argument("--cache-dir", help="shared render cache directory")
+    parser.add_argument("--backend", choices=("latex", "mathtext"), help="SVG backend")
+    parser.add_argument("--jobs", "-j", type=int, help="number of worker processes")
+    parser.add_argument(
+        "--force", action="store_true", help="render unchanged notebooks too"
+    )
+    args = parser.parse_args(argv)
+
+    results = prerender(args.roots, args.cache_dir, args.backend, args.jobs, args.force)
+    return 1 if any(r["status"] == "failed" for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,1090 @@
+"""Renderer objects bundling LaTeX printer settings, a render cache and instrumentation.
+
+Every Renderer passes its own settings to sympy's LaTeX printer on each call instead of
+relying on sympy's global printing configuration, so renderers with different settings
+can be used concurrently from many threads, e.g. one per session of a multi-threaded
+server. The module-level helpers of ipy_course_tools.formula delegate to the current
+renderer, see get_renderer and use_renderer.
+"""
+
+import collections
+import contextlib
+import contextvars
+import io
+import itertools
+import threading
+import time
+
+from IPython.display import Math
+from sympy import Basic, Matrix, MatrixBase
+from sympy.polys.matrices import DomainMatrix
+from sympy.printing.latex import LatexPrinter, latex
+
+from ipy_course_tools.compact import compact_latex, share_macros
+from ipy_course_tools.svg import SVG_BACKENDS, SVGRenderError, svg_display
+
+OUTPUT_MODES = ("math", "svg")
+
+#: rendering methods of Renderer, also module-level helpers in ipy_course_tools.formula
+HELPERS = (
+    "show_formula",
+    "show_matrix",
+    "eval_formula",
+    "unary_bracket",
+    "binary_bracket",
+    "n_ary_bracket",
+    "scalar_product",
+    "norm",
+    "eqn_align",
+    "linear_combination",
+    "linear_hull",
+    "convex_hull",
+    "affine_hull",
+    "show_eigenvects",
+    "show_row_reduction",
+)
+
+#: list collecting displayed formulas instead of rendering them, see magics
+_current_collector = contextvars.ContextVar("ipy_course_tools_collector", default=None)
+
+
+class CollectedFormula:
+    """Stand-in returned by helpers called with display=True while formulas are being
+    collected.
+
+    It displays as nothing, the formula is rendered later together with the rest of the
+    collection.
+
+    Args:
+        data (str): LaTeX source of the collected formula.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def __repr__(self):
+        return f"CollectedFormula({self.data!r})"
+
+    def _ipython_display_(self):
+        pass
+
+
+def _row_reduction_steps(matrix, reduced=False):
+    """Perform Gaussian elimination on a DomainMatrix and record every elementary row
+    operation.
+
+    Over integral domains such as ZZ the forward phase is fraction-free (Bareiss): every
+    step replaces R_i by (p R_i - a R_k) / d, where the division by the previous pivot d
+    is exact. Over fields such as QQ the usual R_i - c R_k steps are used.
+
+    Args:
+        matrix (sympy.Matrix): Matrix to row reduce.
+        reduced (bool, optional): Whether to continue to the reduced row echelon form.
+            Defaults to False.
+
+    Returns:
+        [tuple]: The domain of the entries, the rows of the initial matrix, and a list
+            of (operation, rows) steps.
+    """
+    dm = DomainMatrix.from_Matrix(matrix)
+    domain = dm.domain
+    rows = dm.to_list()
+    initial = [list(row) for row in rows]
+    steps = []
+    pivots = []
+    n_rows, n_cols = dm.shape
+
+    def record(op):
+        steps.append((op, [list(row) for row in rows]))
+
+    previous = domain.one
+    r = 0
+    for c in range(n_cols):
+        if r == n_rows:
+            break
+        pivot_row = next((i for i in range(r, n_rows) if rows[i][c]), None)
+        if pivot_row is None:
+            continue
+        if pivot_row != r:
+            rows[r], rows[pivot_row] = rows[pivot_row], rows[r]
+            record(("swap", r, pivot_row))
+
+        p = rows[r][c]
+        for i in range(r + 1, n_rows):
+            a = rows[i][c]
+            if domain.is_Field:
+                if not a:
+                    continue
+                factor = domain.quo(a, p)
+                rows[i] = [x - factor * y for x, y in zip(rows[i], rows[r])]
+                record(("add", i, r, factor))
+            else:
+                if not a and p == previous:
+                    continue
+                rows[i] = [
+                    domain.exquo(p * x - a * y, previous)
+                    for x, y in zip(rows[i], rows[r])
+                ]
+                record(("combine", i, p, r, a, previous))
+        if not domain.is_Field:
+            previous = p
+        pivots.append((r, c))
+        r += 1
+
+    if reduced:
+        if not domain.is_Field:
+            field = domain.get_field()
+            rows[:] = [[field.convert_from(x, domain) for x in row] for row in rows]
+            domain = field
+        for r, c in reversed(pivots):
+            p = rows[r][c]
+            if p != domain.one:
+                factor = domain.quo(domain.one, p)
+                rows[r] = [factor * x for x in rows[r]]
+                record(("scale", r, factor))
+            for i in range(r):
+                a = rows[i][c]
+                if a:
+                    rows[i] = [x - a * y for x, y in zip(rows[i], rows[r])]
+                    record(("add", i, r, a))
+
+    return domain, initial, steps
+
+
+def _row_term(coef, row, latex, leading=False):
+    """LaTeX of coef * R_row as a term of a sum, with its sign."""
+    if coef == 1:
+        text = f"R_{{{row + 1}}}"
+    elif coef == -1:
+        text = f"-R_{{{row + 1}}}"
+    else:
+        coef_text = latex(coef)
+        if coef.is_Add:
+            coef_text = f"\\left({coef_text}\\right)"
+        text = f"{coef_text} R_{{{row + 1}}}"
+    if leading:
+        return text
+    if text.startswith("-"):
+        return f" - {text[1:].lstrip()}"
+    return f" + {text}"
+
+
+def _row_operation_latex(op, domain, latex):
+    """LaTeX label of a recorded elementary row operation."""
+    kind = op[0]
+    if kind == "swap":
+        return f"R_{{{op[1] + 1}}} \\leftrightarrow R_{{{op[2] + 1}}}"
+    if kind == "scale":
+        return _row_term(domain.to_sympy(op[2]), op[1], latex, leading=True)
+    if kind == "add":
+        return _row_term(1, op[1], latex, leading=True) + _row_term(
+            -domain.to_sympy(op[3]), op[2], latex
+        )
+    # fraction-free combination (p R_i - a R_k) / d
+    _, i, p, k, a, d = op
+    text = _row_term(domain.to_sympy(p), i, latex, leading=True)
+    if a:
+        text += _row_term(-domain.to_sympy(a), k, latex)
+    if d != domain.one:
+        text = f"\\frac{{{text}}}{{{latex(domain.to_sympy(d))}}}"
+    return text
+
+
+class Renderer:
+    """Renders sympy objects and LaTeX formulas with its own settings, cache and
+    statistics.
+
+    Args:
+        output_mode (str, optional): Rendering of helpers called with display=True, one
+            of OUTPUT_MODES. Defaults to "math".
+        svg_backend (str, optional): SVG backend in "svg" mode, one of SVG_BACKENDS.
+            Defaults to None, picking one automatically.
+        svg_cache_dir (str, optional): SVG cache directory in "svg" mode.
+            Defaults to None, using the default cache directory.
+        compact (bool, optional): Whether to emit compact LaTeX, see
+            ipy_course_tools.compact. Defaults to False.
+        cache_size (int, optional): Maximum number of cached LaTeX renders of sympy
+            objects, 0 disables the cache. Defaults to 4096.
+        **latex_settings: Settings of sympy's LaTeX printer, e.g. mat_delim="(" or
+            fold_short_frac=True.
+    """
+
+    def __init__(
+        self,
+        output_mode="math",
+        svg_backend=None,
+        svg_cache_dir=None,
+        compact=False,
+        cache_size=4096,
+        **latex_settings,
+    ):
+        # fail early on unknown printer settings rather than on the first render
+        LatexPrinter(latex_settings)
+        self.latex_settings = latex_settings
+        self.cache_size = cache_size
+        self.set_output_mode(output_mode, backend=svg_backend, cache_dir=svg_cache_dir)
+        self.set_compact(compact)
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    def set_output_mode(self, mode, backend=None, cache_dir=None):
+        """Choose how formulas are rendered when a helper is called with display=True.
+
+        In "math" mode the LaTeX is handed to MathJax in the browser. In "svg" mode it
+        is typeset once on the server and embedded as an image, see
+        ipy_course_tools.svg. Formulas the SVG backend cannot typeset, e.g. matrices
+        with the mathtext backend, are still handed to MathJax.
+
+        Args:
+            mode (str): One of OUTPUT_MODES.
+            backend (str, optional): SVG backend in "svg" mode, one of SVG_BACKENDS.
+                Defaults to None, picking one automatically.
+            cache_dir (str, optional): SVG cache directory in "svg" mode.
+                Defaults to None, using the default cache directory.
+        """
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode: {mode}")
+        if backend is not None and backend not in SVG_BACKENDS:
+            raise ValueError(f"Unknown SVG backend: {backend}")
+        self.output_mode = mode
+        self.svg_backend = backend
+        self.svg_cache_dir = cache_dir
+
+    def set_compact(self, compact=True):
+        """Switch the compact LaTeX mode on or off.
+
+        In compact mode the helpers emit minimal equivalent LaTeX: no redundant
+        whitespace and braces, bmatrix environments for matrices, and repeated matrices
+        of a displayed formula shared through macros. See ipy_course_tools.compact.
+
+        Args:
+            compact (bool, optional): Whether to emit compact LaTeX. Defaults to True.
+        """
+        self.compact = bool(compact)
+
+    def stats(self):
+        """Instrumentation counters of this renderer.
+
+        Returns:
+            dict: Numbers of LaTeX conversions (latex_calls), cache hits and misses,
+                rendered helper outputs (renders) and how many of them were displayed
+                (displays), time spent in sympy's printer (latex_seconds) and the
+                current cache size.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cache_size"] = len(self._cache)
+        for key in ("latex_calls", "cache_hits", "cache_misses", "renders", "displays"):
+            stats.setdefault(key, 0)
+        stats.setdefault("latex_seconds", 0.0)
+        return stats
+
+    def reset_stats(self):
+        """Reset the instrumentation counters."""
+        with self._lock:
+            self._stats.clear()
+
+    def clear_cache(self):
+        """Drop all cached LaTeX renders."""
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _cache_key(expr):
+        # only sympy objects compare structurally, plain Python values and containers
+        # such as (1, 2) and (1.0, 2.0) are equal but render differently
+        if isinstance(expr, MatrixBase):
+            key = (type(expr), expr.as_immutable())
+        elif isinstance(expr, Basic):
+            key = (type(expr), expr)
+        else:
+            return None
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def latex(self, expr):
+        """LaTeX of a sympy object with the settings of this renderer, cached.
+
+        Args:
+            expr (sympy expression or Matrix): Object to render.
+
+        Returns:
+            str: The LaTeX source.
+        """
+        key = self._cache_key(expr) if self.cache_size else None
+        if key is not None:
+            with self._lock:
+                self._stats["latex_calls"] += 1
+                text = self._cache.get(key)
+                if text is not None:
+                    self._cache.move_to_end(key)
+                    self._stats["cache_hits"] += 1
+                    return text
+
+        start = time.perf_counter()
+        text = latex(expr, **self.latex_settings)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            if key is None:
+                self._stats["latex_calls"] += 1
+            self._stats["cache_misses"] += 1
+            self._stats["latex_seconds"] += elapsed
+            if key is not None:
+                self._cache[key] = text
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return text
+
+    def _display(self, text, display):
+        """Return the LaTeX string, or its rendering in the output mode if display is
+        True.
+
+        Only call this for the final output of a helper, helpers build their pieces
+        with latex, so every output is counted and compacted once.
+        """
+        with self._lock:
+            self._stats["renders"] += 1
+            if display:
+                self._stats["displays"] += 1
+        if self.compact:
+            text = compact_latex(text)
+        if not display:
+            return text
+        collector = _current_collector.get()
+        if collector is not None:
+            collector.append(text)
+            return CollectedFormula(text)
+        if self.output_mode == "svg":
+            try:
+                return svg_display(
+                    text, backend=self.svg_backend, cache_dir=self.svg_cache_dir
+                )
+            except SVGRenderError:
+                # e.g. matrices with the mathtext backend, MathJax can typeset them
+                pass
+        if self.compact:
+            text = share_macros(text)
+        return Math(text)
+
+    def show_formula(
+        self, symbol, value, formula_op="=", formula_align=False, display=False
+    ):
+        """Pretty print a sympy formula. This embeds the formula expression a LaTeX
+        equation with a proper LHS, making it possible to name matrices, expressions in
+        output, etc.
+
+        Args:
+            symbol (string): A standard LaTeX string you would like to be on the LHS of
+                a pretty print.
+            matrix (sympy.Matrix): The sympy Matrix object you would like to pretty
+                print.
+            formula_op (str, optional): LaTeX operator symbol. Defaults to "=".
+            formula_align (bool, optional): Whether to add a '&' character for including
+                in align LaTeX environments to the operator symbol. Defaults to False.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        if formula_align:
+            op = f"&{formula_op}"
+        else:
+            op = f"{formula_op}"
+
+        ret_text = f"{symbol} {op} {self.latex(value)}"
+
+        return self._display(ret_text, display)
+
+    def show_matrix(
+        self, symbol, matrix, formula_op="=", formula_align=False, display=False
+    ):
+        """Pretty print a sympy matrix object. This embeds the Matrix render into a
+        LaTeX equation with a proper LHS, making it possible to name matrices in output,
+        etc.
+
+        Args:
+            symbol (string): A standard LaTeX string you would like to be on the LHS of
+                a pretty print.
+            matrix (sympy.Matrix): The sympy Matrix object you would like to pretty
+                print.
+            formula_op (str, optional): LaTeX operator symbol. Defaults to "=".
+            formula_align (bool, optional): Whether to add a '&' character for including
+                in align LaTeX environments to the operator symbol. Defaults to False.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        return self.show_formula(
+            symbol=symbol,
+            value=matrix,
+            formula_op=formula_op,
+            formula_align=formula_align,
+            display=display,
+        )
+
+    def eval_formula(self, formula, display=False):
+        """Pretty print generic sympy formulaic expression.
+
+        Args:
+            formula (sympy expression): Sympy expression to render.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        ret_text = self.latex(formula)
+        return self._display(ret_text, display)
+
+    def unary_bracket(
+        self,
+        x,
+        formula=None,
+        lbracket_string="(",
+        rbracket_string=")",
+        formula_op="=",
+        formula_align=False,
+        subscript=None,
+        display=False,
+        x_latex=False,
+        formula_latex=False,
+        formula_suffix=True,
+    ):
+        """Internal function to pretty print all unary bracketed formulae with sympy. In
+        particular norms, absolute values, etc. can be printed with this.
+
+        Args:
+            x (string or sympy expression): Content of unary symbol you want to pretty
+                print.
+            formula (sypmpy expression or LaTeX string, optional): Additional artifacts
+                you want to render along your unary. Either "evaluates to" or "is equal
+                to" would be good ways to interpret what to put here. Defaults to None.
+            lbracket_string (str, optional): LaTeX bracket type on the left hand side of
+                the unary. Defaults to "(".
+            rbracket_string (str, optional): LaTeX bracket type on the right hand side
+                of the unary. Defaults to ")".
+            formula_op (str, optional): If there is a formula, what should be the
+                operator that separates the formula from the unary? Defaults to "=".
+            formula_align (bool, optional): Whether to add a '&' character for including
+                in align LaTeX environments to the operator symbol. Defaults to False.
+            subscript ([type], optional): Add a subscript to the right hand bracket if
+                not None. Defaults to None.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+            x_latex (bool, optional): Whether the content of the unary is LaTeX (True)
+                or Sympy Expression (False). Defaults to False.
+            formula_latex (bool, optional): Whether the content of the formula is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            formula_suffix (bool, optional): Whether formula comes first (False) or the
+                unary (True). Defaults to True.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        if not x_latex:
+            x_text = self.latex(x)
+        else:
+            x_text = x
+
+        if subscript is None:
+            ret_text = f"\\left{lbracket_string} {x_text} \\right{rbracket_string} "
+        else:
+            ret_text = (
+                f"\\left{lbracket_string} {x_text} \\right{rbracket_string}_{subscript}"
+            )
+
+        if formula_align:
+            op = f"&{formula_op}"
+        else:
+            op = f"{formula_op}"
+
+        if formula is not None:
+            if not formula_latex:
+                if formula_suffix:
+                    ret_text += f"{op} {self.latex(formula)}"
+                else:
+                    ret_text = f"{self.latex(formula)} {op}" + ret_text
+            else:
+                if formula_suffix:
+                    ret_text += f"{op} {formula}"
+                else:
+                    ret_text = f"{formula} {op}" + ret_text
+
+        return self._display(ret_text, display)
+
+    def binary_bracket(
+        self,
+        x,
+        y,
+        formula=None,
+        lbracket_string="(",
+        rbracket_string=")",
+        formula_op="=",
+        formula_align=False,
+        subscript=None,
+        display=False,
+        x_latex=False,
+        y_latex=False,
+        formula_latex=False,
+        formula_suffix=True,
+    ):
+        """Internal function to pretty print all binary bracketed formulae with sympy.
+        In particular scalar products, etc. can be printed with this.
+
+        Args:
+            x (string or sympy expression): Content of binary symbol you want to pretty
+                print, left expression.
+            y (string or sympy expression): Content of binary symbol you want to pretty
+                print, right expression.
+            formula (sypmpy expression or LaTeX string, optional): Additional artifacts
+                you want to render along your unary. Either "evaluates to" or "is equal
+                to" would be good ways to interpret what to put here. Defaults to None.
+            lbracket_string (str, optional): LaTeX bracket type on the left hand side of
+                the unary. Defaults to "(".
+            rbracket_string (str, optional): LaTeX bracket type on the right hand side
+                of the unary. Defaults to ")".
+            formula_op (str, optional): If there is a formula, what should be the
+                operator that separates the formula from the unary? Defaults to "=".
+            formula_align (bool, optional): Whether to add a '&' character for including
+                in align LaTeX environments to the operator symbol. Defaults to False.
+            subscript ([type], optional): Add a subscript to the right hand bracket if
+                not None. Defaults to None.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+            x_latex (bool, optional): Whether the content of the binary left is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            y_latex (bool, optional): Whether the content of the binary right is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            formula_latex (bool, optional): Whether the content of the formula is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            formula_suffix (bool, optional): Whether formula comes first (False) or the
+                binary (True). Defaults to True.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        if not x_latex:
+            x_text = self.latex(x)
+        else:
+            x_text = x
+
+        if not y_latex:
+            y_text = self.latex(y)
+        else:
+            y_text = y
+
+        ret_text = (
+            f"\\left{lbracket_string} {x_text} , {y_text}  \\right{rbracket_string}"
+        )
+        if subscript is None:
+            ret_text += " "
+        else:
+            ret_text += f"_{subscript}"
+
+        if formula_align:
+            op = f"&{formula_op}"
+        else:
+            op = f"{formula_op}"
+
+        if formula is not None:
+            if not formula_latex:
+                if formula_suffix:
+                    ret_text += f"{op} {self.latex(formula)}"
+                else:
+                    ret_text = f"{self.latex(formula)} {op}" + ret_text
+            else:
+                if formula_suffix:
+                    ret_text += f"{op} {formula}"
+                else:
+                    ret_text = f"{formula} {op}" + ret_text
+
+        return self._display(ret_text, display)
+
+    def n_ary_bracket(
+        self,
+        items,
+        formula=None,
+        prefix=None,
+        lbracket_string="(",
+        rbracket_string=")",
+        formula_op="=",
+        formula_align=False,
+        subscript=None,
+        display=False,
+        items_latex=False,
+        formula_latex=False,
+        formula_suffix=True,
+    ):
+        """Internal function to pretty print all n-ary bracketed formulae with sympy. In
+        particular vector systems, convex hulls, etc. can be printed with this.
+
+        Args:
+            items (iterable of strings or sympy expressions, has to be uniform): Content
+                of n-ary symbol you want to pretty print, left expression.
+            formula (sypmpy expression or LaTeX string, optional): Additional artifacts
+                you want to render along your unary. Either "evaluates to" or "is equal
+                to" would be good ways to interpret what to put here. Defaults to None.
+            lbracket_string (str, optional): LaTeX bracket type on the left hand side of
+                the unary. Defaults to "(".
+            rbracket_string (str, optional): LaTeX bracket type on the right hand side
+                of the unary. Defaults to ")".
+            formula_op (str, optional): If there is a formula, what should be the
+                operator that separates the formula from the unary? Defaults to "=".
+            formula_align (bool, optional): Whether to add a '&' character for including
+                in align LaTeX environments to the operator symbol. Defaults to False.
+            subscript ([type], optional): Add a subscript to the right hand bracket if
+                not None. Defaults to None.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+            items_latex (bool, optional): Whether the content of the n-ary is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            formula_latex (bool, optional): Whether the content of the formula is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            formula_suffix (bool, optional): Whether formula comes first (False) or the
+                n-ary (True). Defaults to True.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        # Setting up what's going to be inside the brackets, one item at a time
+        buffer = io.StringIO()
+        term_count = 0
+        for item in items:
+            if term_count:
+                buffer.write(", ")
+            buffer.write(f"{item}" if items_latex else self.latex(item))
+            if term_count:
+                buffer.write(" ")
+            term_count += 1
+
+        if term_count < 1:
+            print("No items received, not printing anything.")
+            return
+
+        in_brackets = buffer.getvalue()
+
+        if subscript is None:
+            ret_text = "{}\\left{} {} \\right{} ".format(
+                prefix, lbracket_string, in_brackets, rbracket_string
+            )
+        else:
+            ret_text = "{}\\left{} {} \\right{}_{}".format(
+                prefix, lbracket_string, in_brackets, rbracket_string, subscript
+            )
+
+        if formula_align:
+            op = f"&{formula_op}"
+        else:
+            op = f"{formula_op}"
+
+        if formula is not None:
+            if not formula_latex:
+                if formula_suffix:
+                    ret_text += f"{op} {self.latex(formula)}"
+                else:
+                    ret_text = f"{self.latex(formula)} {op}" + ret_text
+            else:  # we got latex formula
+                if formula_suffix:
+                    ret_text += f"{op} {formula}"
+                else:
+                    ret_text = f"{formula} {op}" + ret_text
+
+        return self._display(ret_text, display)
+
+    def scalar_product(
+        self,
+        x,
+        y,
+        formula=None,
+        formula_op="=",
+        formula_align=False,
+        subscript=None,
+        display=False,
+        x_latex=False,
+        y_latex=False,
+        formula_latex=False,
+    ):
+        """Pretty print scalar products of the form <x,y>. Special case of
+        binary_bracket with \langle and \\rangle.
+
+        Args:
+            x (string or sympy expression): Content of left element you want to pretty
+                print.
+            y (string or sympy expression): Content of right element you want to pretty
+                print.
+            formula (sypmpy expression or LaTeX string, optional): Additional artifacts
+                you want to render along your unary. Either "evaluates to" or "is equal
+                to" would be good ways to interpret what to put here. Defaults to None.
+            formula_op (str, optional): If there is a formula, what should be the
+                operator that separates the formula from the unary? Defaults to "=".
+            formula_align (bool, optional): Whether to add a '&' character for including
+                in align LaTeX environments to the operator symbol. Defaults to False.
+            subscript ([type], optional): Add a subscript to the right hand bracket if
+                not None. Defaults to None.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+            x_latex (bool, optional): Whether the content of the left element is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            y_latex (bool, optional): Whether the content of the right element is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            formula_latex (bool, optional): Whether the content of the formula is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            formula_suffix (bool, optional): Whether formula comes first (False) or the
+                scalar product (True). Defaults to True.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        return self.binary_bracket(
+            x,
+            y,
+            formula=formula,
+            lbracket_string="\\langle",
+            rbracket_string="\\rangle",
+            formula_op=formula_op,
+            formula_align=formula_align,
+            subscript=subscript,
+            display=display,
+            x_latex=x_latex,
+            y_latex=y_latex,
+            formula_latex=formula_latex,
+        )
+
+    def norm(
+        self,
+        x,
+        formula=None,
+        formula_op="=",
+        formula_align=False,
+        subscript=None,
+        display=False,
+        x_latex=False,
+        formula_latex=False,
+    ):
+        """Pretty print norms of the form |x|. Special case of unary_bracket with \|.\|.
+
+        Args:
+            x (string or sympy expression): Content of the norm you want to pretty
+                print.
+            formula (sypmpy expression or LaTeX string, optional): Additional artifacts
+                you want to render along your norm. Either "evaluates to" or "is equal
+                to" would be good ways to interpret what to put here. Defaults to None.
+            formula_op (str, optional): If there is a formula, what should be the
+                operator that separates the formula from the norm? Defaults to "=".
+            formula_align (bool, optional): Whether to add a '&' character for including
+                in align LaTeX environments to the operator symbol. Defaults to False.
+            subscript ([type], optional): Add a subscript to the right hand bracket if
+                not None. Defaults to None.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+            x_latex (bool, optional): Whether the content of the norm is LaTeX (True) or
+                Sympy Expression (False). Defaults to False.
+            formula_latex (bool, optional): Whether the content of the formula is LaTeX
+                (True) or Sympy Expression (False). Defaults to False.
+            formula_suffix (bool, optional): Whether formula comes first (False) or the
+                norm (True). Defaults to True.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        return self.unary_bracket(
+            x,
+            formula=formula,
+            lbracket_string="\|",
+            rbracket_string="\|",
+            formula_op=formula_op,
+            formula_align=formula_align,
+            subscript=subscript,
+            display=display,
+            x_latex=x_latex,
+            formula_latex=formula_latex,
+        )
+
+    def eqn_align(self, eqn_list, display=False):
+        """Equation array pretty printing. Requires a list of pre-pared LaTeX strings
+        which are then substituted to an appropriately sized align LaTeX environment.
+        Please make sure that all item elements were generated with alignment characters
+        (c.f. formula_align parameters of bracketed expressions).
+
+        Args:
+            eqn_list ([type]): [description]
+            display (bool, optional): [description]. Defaults to False.
+
+        Returns:
+            [type]: [description]
+        """
+        if len(eqn_list) < 1:
+            print("No equations received, not printing anything.")
+            return
+
+        eqn_count = len(eqn_list)
+
+        base_string = "{}"
+        for i in range(1, eqn_count):
+            base_string = base_string + "\\\ {}"
+        start = "\\begin{{align}} "
+        end = " \\end{{align}}"
+        full_string = start + base_string + end
+        eqnarray_string = full_string.format(*eqn_list)
+        return self._display(eqnarray_string, display)
+
+    def linear_combination(
+        self,
+        coefs,
+        vectors,
+        formula,
+        formula_op="=",
+        formula_align=False,
+        display=False,
+        coef_latex=False,
+        vector_latex=False,
+        formula_latex=False,
+        formula_suffix=True,
+    ):
+        if formula_align:
+            op = "&{}".format(formula_op)
+        else:
+            op = "{}".format(formula_op)
+
+        if formula is not None:
+            formula_text = formula if formula_latex else self.latex(formula)
+
+        buffer = io.StringIO()
+        if formula is not None and not formula_suffix:
+            buffer.write(f"{formula_text} {op}")
+
+        # write the coefs and vectors alternatingly, without materialising either
+        missing = object()
+        term_count = 0
+        for coef, vector in itertools.zip_longest(coefs, vectors, fillvalue=missing):
+            if coef is missing or vector is missing:
+                if term_count < 1:
+                    break
+                print(
+                    "The number of coefficients and vectors do not agree. "
+                    "Please provide an equal number of coefficients and vectors."
+                )
+                return
+            if term_count:
+                buffer.write("+ ")
+            buffer.write(f"{coef}" if coef_latex else self.latex(coef))
+            buffer.write(" \\cdot ")
+            buffer.write(f"{vector}" if vector_latex else self.latex(vector))
+            term_count += 1
+
+        if term_count < 1:
+            print("No coefs or vectors received, not printing anything.")
+            return
+
+        if formula is not None and formula_suffix:
+            buffer.write(f"{op} {formula_text}")
+
+        return self._display(buffer.getvalue(), display)
+
+    def linear_hull(
+        self,
+        items,
+        formula=None,
+        formula_op="=",
+        formula_align=False,
+        subscript=None,
+        display=False,
+        items_latex=False,
+        formula_latex=False,
+        formula_suffix=True,
+    ):
+
+        return self.n_ary_bracket(
+            items,
+            formula=formula,
+            prefix="\\text{lin}",
+            lbracket_string="(",
+            rbracket_string=")",
+            formula_op=formula_op,
+            formula_align=formula_align,
+            subscript=subscript,
+            display=display,
+            items_latex=items_latex,
+            formula_latex=formula_latex,
+            formula_suffix=formula_suffix,
+        )
+
+    def convex_hull(
+        self,
+        items,
+        formula=None,
+        formula_op="=",
+        formula_align=False,
+        subscript=None,
+        display=False,
+        items_latex=False,
+        formula_latex=False,
+        formula_suffix=True,
+    ):
+
+        return self.n_ary_bracket(
+            items,
+            formula=formula,
+            prefix="\\text{co}",
+            lbracket_string="(",
+            rbracket_string=")",
+            formula_op=formula_op,
+            formula_align=formula_align,
+            subscript=subscript,
+            display=display,
+            items_latex=items_latex,
+            formula_latex=formula_latex,
+            formula_suffix=formula_suffix,
+        )
+
+    def affine_hull(
+        self,
+        items,
+        formula=None,
+        formula_op="=",
+        formula_align=False,
+        subscript=None,
+        display=False,
+        items_latex=False,
+        formula_latex=False,
+        formula_suffix=True,
+    ):
+
+        return self.n_ary_bracket(
+            items,
+            formula=formula,
+            prefix="\\text{aff}",
+            lbracket_string="(",
+            rbracket_string=")",
+            formula_op=formula_op,
+            formula_align=formula_align,
+            subscript=subscript,
+            display=display,
+            items_latex=items_latex,
+            formula_latex=formula_latex,
+            formula_suffix=formula_suffix,
+        )
+
+    def show_eigenvects(self, symbol, eigenvect_list, display=True):
+        formulae = []
+        for i in range(0, len(eigenvect_list)):
+            eigenvalue = "{" + str(eigenvect_list[i][0]) + "}"
+            eigenv_mult = eigenvect_list[i][1]
+            eigenvectors = eigenvect_list[i][2]
+            formulae += [
+                "{}_{} &= {}".format(
+                    symbol, eigenvalue, self.latex(Matrix([eigenvectors]))
+                )
+            ]
+        return self.eqn_align(formulae, display=display)
+
+    def show_row_reduction(self, matrix, symbol=None, reduced=False, display=False):
+        """Pretty print the steps of a Gaussian elimination as a chain of elementary row
+        operations.
+
+        The elimination is done on a DomainMatrix, fraction-free over integer and
+        polynomial entries, so it stays fast for larger matrices. Rows that are
+        unchanged between two steps reuse their LaTeX.
+
+        Args:
+            matrix (sympy.Matrix): The sympy Matrix object you would like to row reduce.
+            symbol (string, optional): A standard LaTeX string you would like to be on
+                the LHS of the first step. Defaults to None.
+            reduced (bool, optional): Whether to continue to the reduced row echelon
+                form. Defaults to False.
+            display (bool, optional): If False, returns LaTeX string output. If True,
+                returns Math rendering of LaTeX string, or an SVG image in "svg" output
+                mode. Defaults to False.
+
+        Returns:
+            [str or Math render]: Either LaTeX string or IPython rendering thereof.
+        """
+        domain, initial, steps = _row_reduction_steps(matrix, reduced=reduced)
+        n_cols = matrix.shape[1]
+        if n_cols > 10:
+            env_start, env_end = "\\begin{array}{" + "c" * n_cols + "}", "\\end{array}"
+        else:
+            env_start, env_end = "\\begin{matrix}", "\\end{matrix}"
+
+        row_cache = {}
+
+        def matrix_latex(rows):
+            row_texts = []
+            for row in rows:
+                key = tuple(row)
+                if key not in row_cache:
+                    row_cache[key] = " & ".join(
+                        self.latex(domain.to_sympy(x)) for x in row
+                    )
+                row_texts.append(row_cache[key])
+            return f"\\left[{env_start}" + "\\\\".join(row_texts) + f"{env_end}\\right]"
+
+        first = matrix_latex(initial)
+        if symbol is not None:
+            first = f"{symbol} = {first}"
+
+        formulae = []
+        for op, rows in steps:
+            op_latex = _row_operation_latex(op, domain, self.latex)
+            arrow = f"&\\xrightarrow{{{op_latex}}} {matrix_latex(rows)}"
+            if not formulae:
+                arrow = f"{first} {arrow}"
+            formulae.append(arrow)
+        if not formulae:
+            formulae = [first]
+
+        return self.eqn_align(formulae, display=display)
+
+
+#: renderer of the module-level helpers unless another one is active, see use_renderer
+default_renderer = Renderer()
+
+_current_renderer = contextvars.ContextVar("ipy_course_tools_renderer", default=None)
+
+
+def get_renderer():
+    """Renderer used by the module-level helpers in the current context.
+
+    Returns:
+        Renderer: The renderer activated with use_renderer, otherwise default_renderer.
+    """
+    renderer = _current_renderer.get()
+    if renderer is None:
+        return default_renderer
+    return renderer
+
+
+@contextlib.contextmanager
+def use_renderer(renderer):
+    """Make the module-level helpers use the given renderer within a with block.
+
+    The choice is local to the current thread or asyncio task, so concurrent sessions
+    can each use their own renderer.
+
+    Args:
+        renderer (Renderer): Renderer to activate.
+
+    Yields:
+        Renderer: The activated renderer.
+    """
+    token = _current_renderer.set(renderer)
+    try:
+        yield renderer
+    finally:
+        _current_renderer.reset(token)
@@ -0,0 +1,406 @@
+"""Local HTTP render service for formula specs.
+
+Run with::
+
+    python -m ipy_course_tools.serve --port 8765
+    python -m ipy_course_tools.serve --socket /tmp/ipy_course_tools.sock
+
+The service keeps a pool of worker processes that have already imported sympy, so a
+request only pays for the rendering itself. Identical requests that arrive while one is
+being rendered wait for the same result instead of being rendered again, and finished
+results are kept in an LRU cache.
+
+Endpoints:
+    POST /render: Render a JSON spec such as
+            {"helper": "show_matrix",
+             "args": ["A", {"matrix": [[1, "x/2"]]}],
+             "kwargs": {"formula_align": true}}
+        and answer with
+            {"latex": "...", "source": "worker" | "coalesced" | "cache", "ms": 1.2}.
+        Values of the form {"expr": "..."} are parsed with parse_expression,
+        {"matrix": [[...]]} become matrices, all other strings are passed on as LaTeX.
+        An optional "settings" object is passed to Renderer.
+    GET /metrics: Request counts, cache and coalescing statistics, latency and
+        throughput.
+    GET /health: Liveness check.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import signal
+import socketserver
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sympy import Matrix
+
+from ipy_course_tools.parsing import parse_expression
+from ipy_course_tools.renderer import HELPERS, Renderer
+
+#: maximum number of renderers with distinct settings a worker keeps
+WORKER_RENDERERS = 16
+
+_worker_renderers = collections.OrderedDict()
+
+
+def decode_value(value):
+    """Turn a JSON value of a spec into the argument passed to a helper.
+
+    Args:
+        value: JSON value. {"expr": str} is parsed with parse_expression, {"matrix":
+            list} becomes a Matrix, lists are decoded element-wise and everything else
+            is kept as is.
+
+    Returns:
+        The decoded argument.
+    """
+    if isinstance(value, dict):
+        # specs come from untrusted clients, never hand them to sympify
+        if set(value) == {"expr"}:
+            return parse_expression(value["expr"])
+        if set(value) == {"matrix"}:
+            return Matrix(parse_expression(value["matrix"]))
+        raise ValueError(f"Unknown value object: {sorted(value)}")
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    return value
+
+
+def render_spec(spec):
+    """Render a formula spec to LaTeX.
+
+    Args:
+        spec (dict): Spec with "helper", and optional "args", "kwargs" and "settings"
+            keys.
+
+    Returns:
+        str: LaTeX source of the formula.
+    """
+    helper = spec.get("helper")
+    if helper not in HELPERS:
+        raise ValueError(f"Unknown helper: {helper}")
+    settings = spec.get("settings") or {}
+    settings_key = json.dumps(settings, sort_keys=True)
+    renderer = _worker_renderers.get(settings_key)
+    if renderer is None:
+        renderer = _worker_renderers[settings_key] = Renderer(**settings)
+        if len(_worker_renderers) > WORKER_RENDERERS:
+            _worker_renderers.popitem(last=False)
+    else:
+        _worker_renderers.move_to_end(settings_key)
+
+    args = [decode_value(v) for v in spec.get("args", [])]
+    kwargs = {k: decode_value(v) for k, v in (spec.get("kwargs") or {}).items()}
+    kwargs["display"] = False
+    return getattr(renderer, helper)(*args, **kwargs)
+
+
+def _render_task(spec, timeout):
+    # stop the worker itself, a client that gave up must not keep it busy forever
+    if (
+        timeout is None
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        return render_spec(spec)
+
+    expired = []
+
+    def raise_timeout(signum, frame):
+        expired.append(True)
+        raise TimeoutError()
+
+    previous = signal.signal(signal.SIGALRM, raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return render_spec(spec)
+    except Exception:
+        # the parser reports every error, the timeout included, as a SympifyError
+        if expired:
+            raise TimeoutError(f"Rendering took longer than {timeout}s") from None
+        raise
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _warm_worker():
+    render_spec({"helper": "show_matrix", "args": ["A", {"matrix": [["x/2"]]}]})
+
+
+class RenderService:
+    """Renders specs on a warm worker pool, merging identical in-flight requests and
+    caching results.
+
+    Args:
+        workers (int, optional): Number of worker processes. Defaults to None, one per
+            core.
+        cache_size (int, optional): Maximum number of cached results. Defaults to 4096.
+        timeout (float, optional): Seconds a render may take before it is given up,
+            the worker is interrupted as well (on platforms with interval timers).
+            Defaults to 30.0.
+        window (int, optional): Number of recent requests the latency statistics are
+            computed from. Defaults to 1024.
+    """
+
+    def __init__(self, workers=None, cache_size=4096, timeout=30.0, window=1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.workers, initializer=_warm_worker
+        )
+        self._cache = collections.OrderedDict()
+        self._in_flight = {}
+        # reentrant, a done callback may run right away in the thread that registers it
+        self._lock = threading.RLock()
+        self._counts = collections.Counter()
+        self._latencies = collections.deque(maxlen=window)
+        self._started = time.monotonic()
+
+    def warm_up(self):
+        """Start all worker processes and wait until they are ready."""
+        spec = {"helper": "eval_formula", "args": [{"expr": "x"}]}
+        futures = [self.executor.submit(render_spec, spec) for _ in range(self.workers)]
+        concurrent.futures.wait(futures)
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._cache[key] = future.result()
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def render(self, spec):
+        """Render a spec, see render_spec.
+
+        Args:
+            spec (dict): Formula spec.
+
+        Returns:
+            [tuple of str]: The LaTeX source, and where it came from: "cache",
+                "coalesced" or "worker".
+        """
+        start = time.monotonic()
+        key = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+        with self._lock:
+            self._counts["requests"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._counts["cache_hits"] += 1
+                result, source = self._cache[key], "cache"
+            else:
+                future = self._in_flight.get(key)
+                if future is None:
+                    future = self.executor.submit(_render_task, spec, self.timeout)
+                    self._in_flight[key] = future
+                    future.add_done_callback(lambda f: self._finish(key, f))
+                    self._counts["worker_renders"] += 1
+                    source = "worker"
+                else:
+                    self._counts["coalesced"] += 1
+                    source = "coalesced"
+                result = None
+
+        try:
+            if result is None:
+                result = future.result(timeout=self.timeout)
+        except Exception:
+            with self._lock:
+                self._counts["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._latencies.append((time.monotonic(), time.monotonic() - start))
+        return result, source
+
+    def metrics(self):
+        """Request counts, latency and throughput of the service.
+
+        Returns:
+            dict: Counters (requests, cache_hits, coalesced, worker_renders, errors),
+                in_flight and cache_size, uptime_seconds, requests_per_second overall
+                and over the last minute, and latency_ms statistics (mean, p50, p95,
+                max) of recent requests.
+        """
+        now = time.monotonic()
+        with self._lock:
+            metrics = {
+                key: self._counts[key]
+                for key in (
+                    "requests",
+                    "cache_hits",
+                    "coalesced",
+                    "worker_renders",
+                    "errors",
+                )
+            }
+            metrics["in_flight"] = len(self._in_flight)
+            metrics["cache_size"] = len(self._cache)
+            recent = list(self._latencies)
+
+        uptime = now - self._started
+        metrics["workers"] = self.workers
+        metrics["uptime_seconds"] = uptime
+        metrics["requests_per_second"] = (
+            metrics["requests"] / uptime if uptime > 0 else 0.0
+        )
+        metrics["requests_per_second_last_minute"] = (
+            sum(1 for finished, _ in recent if now - finished <= 60.0)
+            / min(60.0, uptime)
+            if uptime > 0
+            else 0.0
+        )
+        latencies = sorted(latency * 1000.0 for _, latency in recent)
+        if latencies:
+            metrics["latency_ms"] = {
+                "mean": statistics.fmean(latencies),
+                "p50": latencies[len(latencies) // 2],
+                "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                "max": latencies[-1],
+            }
+        else:
+            metrics["latency_ms"] = {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        return metrics
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a RenderService, available as server.service."""
+
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        # Unix socket clients have no address
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format, *args):
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, self.server.service.metrics())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.path != "/render":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            spec = json.loads(body)
+            if not isinstance(spec, dict):
+                raise ValueError("The request body has to be a JSON object")
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        start = time.monotonic()
+        try:
+            latex, source = self.server.service.render(spec)
+        except (TimeoutError, concurrent.futures.TimeoutError):
+            self._send_json(504, {"error": "Rendering timed out"})
+            return
+        except Exception as e:
+            self._send_json(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        elapsed = (time.monotonic() - start) * 1000.0
+        self._send_json(200, {"latex": latex, "source": source, "ms": elapsed})
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threading HTTP server listening on a Unix socket."""
+
+    daemon_threads = True
+
+
+def make_server(service, host="127.0.0.1", port=8765, socket_path=None, verbose=False):
+    """Create an HTTP server in front of a render service.
+
+    Args:
+        service (RenderService): Service answering the requests.
+        host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+        port (int, optional): TCP port to listen on, 0 picks a free one.
+            Defaults to 8765.
+        socket_path (str, optional): Listen on this Unix socket instead of TCP. Defaults
+            to None.
+        verbose (bool, optional): Whether to log every request. Defaults to False.
+
+    Returns:
+        socketserver.BaseServer: The server, call serve_forever() to run it.
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, RenderRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ipy_course_tools.serve",
+        description="Local formula render service.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to listen on")
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument(
+        "--cache-size", type=int, default=4096, help="number of cached results"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=30.0, help="render timeout in seconds"
+    )
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    service = RenderService(
+        workers=args.workers, cache_size=args.cache_size, timeout=args.timeout
+    )
+    service.warm_up()
+    server = make_server(service, args.host, args.port, args.socket, args.verbose)
+    where = args.socket or "http://{}:{}".format(*server.server_address[:2])
+    print(f"Serving formulas on {where} with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
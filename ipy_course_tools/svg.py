@@ -0,0 +1,220 @@
+"""Local rendering of LaTeX formulas to SVG.
+
+Rendered images are stored in a content-addressed cache directory, so every distinct
+formula is only typeset once per machine and notebooks can ship finished images instead
+of leaving the typesetting to MathJax in every student's browser.
+
+Two backends are available: "latex" runs a local latex and dvisvgm installation and
+supports everything amsmath does, "mathtext" uses matplotlib's built-in TeX subset,
+which needs no TeX installation but does not support matrix and align environments.
+matplotlib is optional (pip install ipy_course_tools[svg]), without it the mathtext
+backend cannot typeset anything.
+Formulas a backend cannot typeset raise SVGRenderError, in "svg" output mode the helpers
+then leave them to MathJax.
+"""
+
+import base64
+import hashlib
+import html
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+
+from IPython.display import HTML
+
+SVG_BACKENDS = ("latex", "mathtext")
+
+#: bump whenever the output of a backend changes, so stale cache entries are not reused
+SVG_FORMAT_VERSION = 1
+
+
+class SVGRenderError(ValueError):
+    """Raised when an SVG backend cannot typeset a formula."""
+
+
+LATEX_DOCUMENT = r"""\documentclass{{article}}
+\usepackage{{amsmath}}
+\usepackage{{amssymb}}
+\pagestyle{{empty}}
+\begin{{document}}
+{body}
+\end{{document}}
+"""
+
+
+def default_cache_dir():
+    """Directory of the SVG cache.
+
+    Returns:
+        str: The IPY_COURSE_TOOLS_CACHE environment variable if set, otherwise
+            ~/.cache/ipy_course_tools.
+    """
+    return os.environ.get(
+        "IPY_COURSE_TOOLS_CACHE",
+        os.path.join(os.path.expanduser("~"), ".cache", "ipy_course_tools"),
+    )
+
+
+def default_backend():
+    """SVG backend used when none is given.
+
+    Returns:
+        str: "latex" if latex and dvisvgm are on the PATH, "mathtext" otherwise.
+    """
+    if shutil.which("latex") and shutil.which("dvisvgm"):
+        return "latex"
+    return "mathtext"
+
+
+def svg_cache_key(latex, backend):
+    """Content address of a rendered formula.
+
+    Args:
+        latex (str): LaTeX source of the formula.
+        backend (str): SVG backend, one of SVG_BACKENDS.
+
+    Returns:
+        str: Hex digest identifying the rendered image.
+    """
+    content = f"{SVG_FORMAT_VERSION}\0{backend}\0{latex}"
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _latex_body(latex):
+    if latex.startswith("\\begin{align}") and latex.endswith("\\end{align}"):
+        return (
+            "\\begin{align*}"
+            + latex[len("\\begin{align}") : -len("\\end{align}")]
+            + "\\end{align*}"
+        )
+    return f"\\[ {latex} \\]"
+
+
+def _render_latex(latex):
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "formula.tex"), "w") as f:
+            f.write(LATEX_DOCUMENT.format(body=_latex_body(latex)))
+        commands = [
+            ["latex", "-interaction=nonstopmode", "-halt-on-error", "formula.tex"],
+            [
+                "dvisvgm",
+                "--no-fonts",
+                "--exact-bbox",
+                "-o",
+                "formula.svg",
+                "formula.dvi",
+            ],
+        ]
+        for command in commands:
+            proc = subprocess.run(
+                command, cwd=tmp, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+            )
+            if proc.returncode != 0:
+                raise SVGRenderError(
+                    f"Rendering {latex!r} failed in {command[0]}:\n"
+                    + proc.stdout.decode("utf-8", "replace")
+                )
+        with open(os.path.join(tmp, "formula.svg"), "r") as f:
+            return f.read()
+
+
+def _render_mathtext(latex):
+    if "\\begin{" in latex:
+        raise SVGRenderError(
+            f"The mathtext backend cannot typeset environments: {latex!r}"
+        )
+
+    try:
+        from matplotlib.mathtext import math_to_image
+    except ImportError as e:
+        # matplotlib is optional, without it MathJax typesets every formula
+        raise SVGRenderError(f"The mathtext backend needs matplotlib: {e}") from e
+
+    buffer = io.BytesIO()
+    try:
+        math_to_image(f"${latex}$", buffer, format="svg")
+    except ValueError as e:
+        raise SVGRenderError(f"Rendering {latex!r} failed in mathtext: {e}") from e
+    return buffer.getvalue().decode("utf-8")
+
+
+def render_svg(latex, backend=None, cache_dir=None):
+    """Render a LaTeX formula to SVG, reusing a cached image if there is one.
+
+    Args:
+        latex (str): LaTeX source of the formula, as returned by the helpers of this
+            package.
+        backend (str, optional): SVG backend, one of SVG_BACKENDS.
+            Defaults to default_backend().
+        cache_dir (str, optional): Cache directory. Defaults to default_cache_dir().
+
+    Returns:
+        str: SVG markup of the rendered formula.
+
+    Raises:
+        SVGRenderError: If the backend cannot typeset the formula. Failures are not
+            cached.
+    """
+    if backend is None:
+        backend = default_backend()
+    if backend not in SVG_BACKENDS:
+        raise ValueError(f"Unknown SVG backend: {backend}")
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+
+    key = svg_cache_key(latex, backend)
+    path = os.path.join(cache_dir, "svg", key[:2], f"{key}.svg")
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return f.read()
+
+    if backend == "latex":
+        svg = _render_latex(latex)
+    else:
+        svg = _render_mathtext(latex)
+
+    # write to a temporary file first so concurrent readers never see a partial image
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(svg)
+    os.replace(tmp_path, path)
+    return svg
+
+
+def svg_html(latex, backend=None, cache_dir=None):
+    """HTML inline image of a formula rendered to SVG.
+
+    The image is embedded as a data URI rather than as inline SVG markup, so element ids
+    of several images on one page cannot clash. The LaTeX source is kept as alternative
+    text.
+
+    Args:
+        latex (str): LaTeX source of the formula.
+        backend (str, optional): SVG backend, one of SVG_BACKENDS.
+            Defaults to default_backend().
+        cache_dir (str, optional): Cache directory. Defaults to default_cache_dir().
+
+    Returns:
+        str: An HTML img element.
+    """
+    svg = render_svg(latex, backend=backend, cache_dir=cache_dir)
+    data = base64.b64encode(svg.encode("utf-8")).decode("ascii")
+    return f'<img src="data:image/svg+xml;base64,{data}" alt="{html.escape(latex)}"/>'
+
+
+def svg_display(latex, backend=None, cache_dir=None):
+    """IPython rendering of a formula pre-rendered to SVG.
+
+    Args:
+        latex (str): LaTeX source of the formula.
+        backend (str, optional): SVG backend, one of SVG_BACKENDS.
+            Defaults to default_backend().
+        cache_dir (str, optional): Cache directory. Defaults to default_cache_dir().
+
+    Returns:
+        HTML render: The formula as an inline image.
+    """
+    return HTML(svg_html(latex, backend=backend, cache_dir=cache_dir))
@@ -52,6 +52,7 @@ if __name__ == "__main__":
         maintainer="Kovacs Mae",
         maintainer_email="mate.kovacs@alphacruncher.com",
         install_requires=requirements,
+        extras_require={"svg": ["matplotlib"]},
         keywords=["ipy_course_tools"],
         packages=["ipy_course_tools"],
         zip_safe=False,
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from sympy import Integer, Matrix, Symbol, cos, sin, sympify
+
+from ipy_course_tools import checker
+
+x = Symbol("x")
+
+
+class CheckerTestCase(unittest.TestCase):
+    """ Answer-equivalence checker tests """
+
+    def test_expressions(self):
+        """ check equivalent and different expressions """
+        self.assertTrue(checker.expressions_equivalent("(x + 1)**2", x ** 2 + 2 * x + 1))
+        self.assertTrue(checker.expressions_equivalent(sin(x) ** 2 + cos(x) ** 2, 1))
+        self.assertFalse(checker.expressions_equivalent("x**2 + 2*x", x ** 2 + 2 * x + 1))
+        self.assertFalse(checker.expressions_equivalent("x +", x))
+
+    def test_exact_answers(self):
+        """ check exact answers are compared without tolerance and floating ones with it """
+        self.assertFalse(checker.expressions_equivalent("1000000001", 1000000000))
+        self.assertFalse(checker.expressions_equivalent("x", "x + 10**-11"))
+        self.assertFalse(checker.expressions_equivalent([[1, "x"]], [[1, "x + 10**-11"]]))
+        self.assertTrue(checker.expressions_equivalent("sqrt(2)*sqrt(3)", "sqrt(6)"))
+        self.assertTrue(checker.expressions_equivalent("exp(log(x) + 1)", "E*x"))
+        self.assertTrue(checker.expressions_equivalent("0.1 + 0.2", "0.3"))
+        self.assertTrue(checker.expressions_equivalent("3.14159265358979", "pi"))
+
+    def test_malicious_answers(self):
+        """ check answers are never evaluated as Python code """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "pwned")
+            for answer in (
+                f"__import__('os').system('touch {path}') or x",
+                "x.func",
+                "(lambda: x)()",
+                "sympify('x')",
+            ):
+                self.assertFalse(checker.expressions_equivalent(answer, x))
+                self.assertFalse(checker.check_answer([answer], [[1]], kind="linear_hull"))
+            self.assertFalse(os.path.exists(path))
+
+    def test_non_expressions(self):
+        """ check relations and booleans are rejected instead of crashing the checks """
+        for answer in ("x > 1", "True", "Eq(x, 1)"):
+            self.assertFalse(checker.expressions_equivalent(answer, x))
+            self.assertFalse(checker.expressions_equivalent([[answer]], [[x]]))
+            self.assertFalse(checker.check_answer([[answer, 1]], [[1, 1]], kind="linear_hull"))
+
+    def test_inconclusive_falls_back(self):
+        """ check the symbolic fallback when the numeric test is inconclusive """
+        self.assertIsNone(checker.numeric_equivalence(sympify("1/(x - x)"), Integer(0)))
+        self.assertFalse(checker.expressions_equivalent("1/(x - x)", 0))
+
+    def test_matrices(self):
+        """ check matrices are compared by shape and entries """
+        reference = Matrix([[1, x], [x ** 2, 0]])
+        self.assertTrue(checker.expressions_equivalent([[1, x], ["x*x", 0]], reference))
+        self.assertFalse(checker.expressions_equivalent([[1, x]], reference))
+        self.assertFalse(checker.expressions_equivalent(x, reference))
+
+    def test_sets(self):
+        """ check set-valued answers """
+        self.assertTrue(checker.check_answer([[1, 1, 0], [1, -1, 0]], [[1, 0, 0], [0, 1, 0]], kind="linear_hull"))
+        self.assertFalse(checker.check_answer([[1, 0, 0]], [[0, 1, 0]], kind="linear_hull"))
+        self.assertTrue(checker.check_answer([[2, -1], [-1, 2]], [[1, 0], [0, 1]], kind="affine_hull"))
+        self.assertFalse(checker.check_answer([[0, 0], [1, 1]], [[1, 0], [0, 1]], kind="affine_hull"))
+        self.assertTrue(checker.check_answer([[1, 0], [0, 1], [1, 0]], [[0, 1], [1, 0]], kind="convex_hull"))
+        triangle = [[0, 0], [1, 0], [0, 1]]
+        self.assertTrue(checker.check_answer(triangle + [["1/4", "1/4"]], triangle, kind="convex_hull"))
+        self.assertTrue(checker.check_answer(triangle + [["1/2", "1/2"]], triangle, kind="convex_hull"))
+        self.assertFalse(checker.check_answer(triangle + [[1, 1]], triangle, kind="convex_hull"))
+        self.assertFalse(checker.check_answer(triangle[1:], triangle, kind="convex_hull"))
+        self.assertTrue(checker.check_answer([[2, 2], [1, -1]], [[-1, 1], [1, 1]], kind="scaled_basis"))
+        self.assertFalse(checker.check_answer([[2, 2], [1, 1]], [[-1, 1], [1, 1]], kind="scaled_basis"))
+        self.assertFalse(checker.check_answer([[0, 0]], [[1, 0]], kind="scaled_basis"))
+        self.assertFalse(checker.check_answer([[1, 0]], [[0, 0]], kind="scaled_basis"))
+        # decimals are taken at face value, like in the expression checks
+        self.assertTrue(checker.check_answer([["1.0", "0.0"], [0, 0], [0, 1]], triangle, kind="convex_hull"))
+        self.assertTrue(checker.check_answer(triangle, [["1.0", "0.0"], [0, 0], [0, 1]], kind="convex_hull"))
+        self.assertFalse(checker.check_answer([["1.01", "0.0"], [0, 0], [0, 1]], triangle, kind="convex_hull"))
+        self.assertTrue(checker.check_answer([["0.1", "0.3"]], [[1, 3]], kind="scaled_basis"))
+        self.assertFalse(checker.check_answer([["0.1", "0.31"]], [[1, 3]], kind="scaled_basis"))
+        self.assertTrue(checker.check_answer([["0.5", "0.5"], [1, "-1.0"]], [[1, 0], [0, 1]], kind="linear_hull"))
+        self.assertTrue(checker.check_answer([["2.0", "-1"], [-1, "2.0"]], [[1, 0], [0, 1]], kind="affine_hull"))
+
+    def test_batch(self):
+        """ check batches give the same results serially and in parallel """
+        submissions = [("(x + 1)**2", "x**2 + 2*x + 1"), ("x", "2*x"), ([1, 2], Matrix([1, 2]))]
+        self.assertEqual(checker.check_batch(submissions, processes=1), [True, False, True])
+        self.assertEqual(checker.check_batch(submissions, processes=2), [True, False, True])
+        with self.assertRaises(ValueError):
+            checker.check_batch(submissions, kind="proof")
+
+    def test_batch_failures(self):
+        """ check a failing item does not discard the results of the batch """
+        submissions = [("x", "x"), ("x > 1", "x"), ("True", "x"), ("x", "x > 1")]
+        self.assertEqual(checker.check_batch(submissions, processes=1), [True, False, False, None])
+        self.assertEqual(checker.check_batch(submissions, processes=2), [True, False, False, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import re
+import unittest
+
+from sympy import Matrix, Rational, Symbol
+
+from ipy_course_tools import compact, formula
+
+x = Symbol("x")
+v = Matrix([1, 2, 3])
+A = Matrix([[1, Rational(1, 2)], [x ** 2, 0]])
+
+
+def _expand_macros(latex):
+    """Inline \\def macros the way TeX expands them."""
+    macros = {}
+    while latex.startswith("\\def"):
+        match = re.match(r"\\def(\\[A-Za-z]+)\{", latex)
+        depth, i = 1, match.end()
+        while depth:
+            depth += {"{": 1, "}": -1}.get(latex[i], 0)
+            i += 1
+        macros[match.group(1)] = latex[match.end() : i - 1]
+        latex = latex[i:]
+    for name, body in macros.items():
+        latex = re.sub(re.escape(name) + r"(?:\{\}|(?![A-Za-z]))", lambda m: body, latex)
+    return latex
+
+
+def typeset_tokens(latex):
+    """TeX token stream of a formula, up to differences that do not change the typeset result.
+
+    Delimiters keep their \\left and \\right, and bmatrix and pmatrix are replaced by their amsmath
+    definitions, so any change of delimiter sizes or atom types shows up in the tokens.
+    """
+    latex = _expand_macros(latex)
+    for env, (left, right) in {"bmatrix": ("[", "]"), "pmatrix": ("(", ")")}.items():
+        latex = latex.replace(f"\\begin{{{env}}}", f"\\left{left}\\begin{{matrix}}")
+        latex = latex.replace(f"\\end{{{env}}}", f"\\end{{matrix}}\\right{right}")
+    tokens = re.findall(r"\\[A-Za-z]+|\\.|\S", latex)
+    out = []
+    for token in tokens:
+        out.append(token)
+        # a single token braced as sub- or superscript
+        if len(out) >= 4 and out[-4] in ("_", "^") and out[-3] == "{" and out[-1] == "}":
+            out[-3:] = [out[-2]]
+    return out
+
+
+class CompactTestCase(unittest.TestCase):
+    """ Compact LaTeX output mode tests """
+
+    def setUp(self):
+        self.addCleanup(formula.set_compact, False)
+
+    def outputs(self):
+        return [
+            formula.show_matrix("A", A),
+            formula.norm(v, formula=14),
+            formula.norm(x, subscript=2),
+            formula.scalar_product(v, v, formula=14, formula_align=True),
+            formula.linear_hull([v, v], subscript="\\mathbb{R}"),
+            formula.convex_hull([v], formula=v, formula_suffix=False),
+            formula.linear_combination([1, 2, 3], [v, v, v], 6 * v),
+            formula.eqn_align([formula.show_matrix("A", A, formula_align=True), formula.show_formula("y", x ** 2, formula_align=True)]),
+            formula.show_row_reduction(Matrix([[0, 2, 1], [1, 1, 1], [2, 4, 3]])),
+            formula.linear_combination([1, 2, 3], [v, v, v], 6 * v, display=True).data,
+        ]
+
+    def test_smaller(self):
+        """ check compact output is shorter """
+        verbose = self.outputs()
+        formula.set_compact()
+        for before, after in zip(verbose, self.outputs()):
+            self.assertLess(len(after), len(before))
+
+    def test_typeset_unchanged(self):
+        """ check compact output typesets to the same token stream """
+        verbose = self.outputs()
+        formula.set_compact()
+        for before, after in zip(verbose, self.outputs()):
+            self.assertEqual(typeset_tokens(after), typeset_tokens(before), after)
+
+    def test_shared_macros(self):
+        """ check repeated matrices are shared through macros on display """
+        formula.set_compact()
+        text = formula.linear_combination([1, 2, 3], [v, v, v], 6 * v, display=True).data
+        self.assertTrue(text.startswith("\\def\\ict"))
+        self.assertEqual(text.count("\\begin{bmatrix}1\\\\2\\\\3\\end{bmatrix}"), 1)
+
+    def test_macro_boundaries(self):
+        """ check shared matrices keep following letters and scripts where they belong """
+        matrix = "\\begin{bmatrix}1&2&3\\\\4&5&6\\end{bmatrix}"
+        shared = compact.share_macros(f"{matrix}^2+{matrix}x+{matrix}")
+        name = re.match(r"\\def(\\[a-z]+)", shared).group(1)
+        self.assertTrue(shared.endswith(f"}}{name}^2+{name}{{}}x+{name}"))
+        self.assertEqual(typeset_tokens(shared), typeset_tokens(f"{matrix}^2+{matrix}x+{matrix}"))
+
+    def test_text_kept(self):
+        """ check whitespace in text arguments and after control words is kept """
+        self.assertEqual(compact.squeeze_whitespace("\\text{for all } x \\in  A"), "\\text{for all }x\\in A")
+        self.assertEqual(compact.squeeze_whitespace("a \\\\ [b]"), "a\\\\ [b]")
+        self.assertEqual(compact.compact_latex(compact.compact_latex(formula.norm(v))), compact.compact_latex(formula.norm(v)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from sympy import Matrix, Rational
+
+from ipy_course_tools import formula, renderer
+
+
+class RowReductionTestCase(unittest.TestCase):
+    """ Row reduction renderer tests """
+
+    def final_matrix(self, matrix, reduced):
+        domain, initial, steps = renderer._row_reduction_steps(matrix, reduced=reduced)
+        rows = steps[-1][1] if steps else initial
+        return Matrix([[domain.to_sympy(x) for x in row] for row in rows])
+
+    def test_echelon_form(self):
+        """ check the fraction-free forward phase yields an equivalent echelon form """
+        matrix = Matrix([[0, 2, 1, 4], [1, 1, 1, 0], [2, 4, 3, 4], [3, 1, 0, 2]])
+        final = self.final_matrix(matrix, reduced=False)
+        self.assertTrue(final.is_echelon)
+        self.assertEqual(final.rref()[0], matrix.rref()[0])
+
+    def test_reduced_form(self):
+        """ check the reduced row echelon form agrees with sympy """
+        for matrix in (
+            Matrix([[0, 2, 1], [1, 1, 1], [2, 4, 3]]),
+            Matrix([[Rational(1, 2), 2], [3, 4]]),
+            Matrix([[1, 2, 3], [2, 4, 6]]),
+        ):
+            self.assertEqual(self.final_matrix(matrix, reduced=True), matrix.rref()[0])
+
+    def test_render(self):
+        """ check the rendered chain of operations """
+        text = formula.show_row_reduction(Matrix([[0, 2], [1, 1]]), symbol="A")
+        self.assertEqual(
+            text,
+            "\\begin{align} A = \\left[\\begin{matrix}0 & 2\\\\1 & 1\\end{matrix}\\right] "
+            "&\\xrightarrow{R_{1} \\leftrightarrow R_{2}} "
+            "\\left[\\begin{matrix}1 & 1\\\\0 & 2\\end{matrix}\\right] \\end{align}",
+        )
+        self.assertIn("\\xrightarrow{R_{2} - 6 R_{1}}", formula.show_row_reduction(Matrix([[Rational(1, 2), 2], [3, 4]])))
+        self.assertIn("\\xrightarrow{2 R_{3} - 2 R_{2}}", formula.show_row_reduction(Matrix([[1, 1, 1], [0, 2, 1], [0, 2, 1]])))
+
+
+class StreamingTestCase(unittest.TestCase):
+    """ Iterable input tests """
+
+    def test_linear_combination(self):
+        """ check generators render like lists and zero coefficients are kept """
+        v, w = Matrix([1, 2]), Matrix([3, 4])
+        self.assertEqual(
+            formula.linear_combination((c for c in [1, 2]), iter([v, w]), v + w),
+            formula.linear_combination([1, 2], [v, w], v + w),
+        )
+        self.assertEqual(
+            formula.linear_combination([0, 1], ["v", "w"], "w", coef_latex=True, vector_latex=True, formula_latex=True),
+            "0 \\cdot v+ 1 \\cdot w= w",
+        )
+        self.assertIsNone(formula.linear_combination(iter([1, 2]), iter([v]), None))
+        self.assertIsNone(formula.linear_combination(iter([]), [v], None))
+
+    def test_n_ary_bracket(self):
+        """ check generators render like lists """
+        vectors = [Matrix([1, 2]), Matrix([3, 4]), Matrix([5, 6])]
+        self.assertEqual(formula.linear_hull(v for v in vectors), formula.linear_hull(vectors))
+        self.assertEqual(
+            formula.convex_hull(iter(["x", "y", "z"]), items_latex=True),
+            "\\text{co}\\left( x, y , z  \\right) ",
+        )
+        self.assertIsNone(formula.n_ary_bracket(iter([])))
+
+    def test_n_ary_subscript(self):
+        """ check the prefix of n-ary brackets is kept in front of the brackets when there is a subscript """
+        self.assertEqual(
+            formula.linear_hull(["u", "v"], items_latex=True, subscript="\\mathbb{R}"),
+            "\\text{lin}\\left( u, v  \\right)_\\mathbb{R}",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
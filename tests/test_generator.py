@@ -0,0 +1,62 @@
+import io
+import json
+import random
+import unittest
+
+from sympy import Matrix, diag
+
+from ipy_course_tools import generator
+
+
+class GeneratorTestCase(unittest.TestCase):
+    """ Exercise variant generator tests """
+
+    def test_unimodular_inverse(self):
+        """ check the tracked inverse of a unimodular matrix """
+        rng = random.Random(0)
+        for size in (1, 2, 3, 4):
+            mat, inv = generator.unimodular_matrix(size, rng)
+            self.assertEqual(Matrix(mat) * Matrix(inv), Matrix.eye(size))
+            self.assertIn(Matrix(mat).det(), (1, -1))
+
+    def test_prescribed_spectrum(self):
+        """ check matrices are built with the requested eigenvalues """
+        rng = random.Random(1)
+        for _ in range(20):
+            eigenvalues = [rng.randint(-5, 5) for _ in range(3)]
+            mat, p = generator.matrix_with_eigenvalues(eigenvalues, rng)
+            self.assertEqual(Matrix(mat) * Matrix(p), Matrix(p) * diag(*eigenvalues))
+
+    def test_reproducible(self):
+        """ check variants only depend on the seed, not on the process pool """
+        serial = list(generator.generate_variants(40, seed=7, processes=1))
+        pooled = list(generator.generate_variants(40, seed=7, processes=2, chunksize=8))
+        self.assertEqual(serial, pooled)
+        self.assertEqual(serial[5], generator.generate_variant(7, 5))
+        self.assertNotEqual(serial, list(generator.generate_variants(40, seed=8, processes=1)))
+
+    def test_poly_statement(self):
+        """ check poly statements contain the sampled coefficients """
+        variants = [generator.poly_variant(random.Random(i), degrees=(2,)) for i in range(10)]
+        for variant in variants:
+            for i, c in enumerate(variant["data"]["coefficients"]):
+                self.assertIn(f"a_{{{i}}} = {c}", variant["statement"])
+        self.assertGreater(len({v["statement"] for v in variants}), 1)
+
+    def test_write_jsonl(self):
+        """ check variants are streamed as JSON Lines """
+        out = io.StringIO()
+        written = generator.write_variants(out, 12, seed=3, kinds=("eigen",), processes=1)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(written, 12)
+        self.assertEqual([json.loads(line)["index"] for line in lines], list(range(12)))
+        self.assertTrue(all(json.loads(line)["kind"] == "eigen" for line in lines))
+
+    def test_unknown_kind(self):
+        """ check unknown exercise kinds are rejected """
+        with self.assertRaises(ValueError):
+            list(generator.generate_variants(1, kinds=("proof",)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+from IPython.core.interactiveshell import InteractiveShell
+from sympy import Matrix
+
+import ipy_course_tools
+from ipy_course_tools import formula, magics
+
+v = Matrix([1, 2])
+
+
+class MagicsTestCase(unittest.TestCase):
+    """ Formula batching tests """
+
+    def test_collect(self):
+        """ check displayed formulas are collected and shown once """
+        with mock.patch.object(magics, "ipython_display") as display:
+            with magics.collect_formulas() as formulas:
+                placeholder = formula.show_matrix("A", v, formula_align=True, display=True)
+                text = formula.norm(v, formula=5, formula_align=True)
+                formula.eqn_align([text, text], display=True)
+            self.assertEqual(len(formulas), 2)
+            self.assertEqual(placeholder.data, formula.show_matrix("A", v, formula_align=True))
+            display.assert_called_once()
+            combined = display.call_args[0][0].data
+        self.assertEqual(combined, formula.eqn_align([formulas[0], text, text]))
+        self.assertEqual(combined.count("\\begin{align}"), 1)
+        self.assertNotIsInstance(formula.show_matrix("A", v, display=True), type(placeholder))
+
+    def test_nothing_collected(self):
+        """ check nothing is displayed for cells without formulas """
+        with mock.patch.object(magics, "ipython_display") as display:
+            with magics.collect_formulas():
+                formula.show_matrix("A", v)
+        display.assert_not_called()
+
+    def test_cell_magic(self):
+        """ check the %%formulas cell magic """
+        shell = InteractiveShell.instance()
+        ipy_course_tools.load_ipython_extension(shell)
+        with mock.patch.object(magics, "ipython_display") as display:
+            shell.run_cell_magic(
+                "formulas",
+                "",
+                "from sympy import Matrix\n"
+                "from ipy_course_tools import show_matrix\n"
+                "for i in range(3):\n"
+                "    show_matrix('A_{}'.format(i), Matrix([i]), formula_align=True, display=True)\n",
+            )
+        display.assert_called_once()
+        combined = display.call_args[0][0].data
+        self.assertEqual(combined.count("\\\\"), 2)
+        self.assertIn("A_2 &=", combined)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from sympy import Matrix, Max, Symbol, sqrt
+from sympy.core.sympify import SympifyError
+
+from ipy_course_tools import parsing
+
+x = Symbol("x")
+
+
+class ParsingTestCase(unittest.TestCase):
+    """ Safe expression parser tests """
+
+    def test_parse(self):
+        """ check mathematical input parses like sympify """
+        self.assertEqual(parsing.parse_expression("x^2 + 2*x"), x ** 2 + 2 * x)
+        self.assertEqual(parsing.parse_expression("sqrt(8)"), 2 * sqrt(2))
+        self.assertEqual(parsing.parse_expression("max(x, 1)"), Max(x, 1))
+        self.assertEqual(parsing.parse_expression("Matrix([[1, x]])"), Matrix([[1, x]]))
+        self.assertEqual(parsing.parse_expression(["1/2", 3]), [parsing.parse_expression("1/2"), 3])
+
+    def test_rejected(self):
+        """ check code that is not plain mathematics is rejected before evaluation """
+        for text in (
+            "__import__('os').system('echo unsafe')",
+            "x.func",
+            "sympify('x')",
+            "lambda: x",
+            "[x][0:1]",
+            "(y := x)",
+            "x +",
+        ):
+            with self.assertRaises(SympifyError):
+                parsing.parse_expression(text)
+        with self.assertRaises(SympifyError):
+            parsing.parse_expression(object())
+
+
+if __name__ == "__main__":
+    unittest.main()
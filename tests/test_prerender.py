@@ -0,0 +1,88 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+from ipy_course_tools import prerender, svg
+from ipy_course_tools.renderer import Renderer
+
+HAS_MATPLOTLIB = importlib.util.find_spec("matplotlib") is not None
+
+
+def write_notebook(path, *sources):
+    cells = [{"cell_type": "code", "metadata": {}, "outputs": [], "execution_count": None, "source": s} for s in sources]
+    with open(path, "w") as f:
+        json.dump({"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}, f)
+
+
+class PrerenderTestCase(unittest.TestCase):
+    """ Batch pre-render tests """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.course = os.path.join(tmp.name, "course")
+        self.cache = os.path.join(tmp.name, "cache")
+        os.makedirs(os.path.join(self.course, "week1", ".ipynb_checkpoints"))
+        self.lesson = os.path.join(self.course, "week1", "lesson.ipynb")
+        write_notebook(
+            self.lesson,
+            "%load_ext ipy_course_tools\nfrom ipy_course_tools import norm",
+            "norm('x', formula='1', x_latex=True, formula_latex=True, display=True)",
+            "for i in range(3):\n    norm('x', formula=str(i), x_latex=True, formula_latex=True, display=True)",
+        )
+        write_notebook(os.path.join(self.course, "intro.ipynb"), "print('no formulas here')")
+        write_notebook(os.path.join(self.course, "week1", ".ipynb_checkpoints", "lesson-checkpoint.ipynb"), "")
+
+    def test_scan(self):
+        """ check notebooks and helper calls are found """
+        self.assertEqual(
+            prerender.find_notebooks(self.course),
+            [os.path.join(self.course, "intro.ipynb"), self.lesson],
+        )
+        self.assertEqual(prerender.helper_calls(prerender.notebook_sources(self.lesson)), {"norm"})
+        self.assertEqual(prerender.helper_calls(["def norm(x):\n    pass\nnorm(1)"]), set())
+
+    @unittest.skipUnless(HAS_MATPLOTLIB, "matplotlib is not installed")
+    def test_prerender(self):
+        """ check formulas are rendered into the cache and unchanged notebooks are skipped """
+        lines = []
+        results = prerender.prerender([self.course], cache_dir=self.cache, backend="mathtext", jobs=1, report=lines.append)
+        status = {os.path.basename(r["path"]): r for r in results}
+        self.assertEqual(status["intro.ipynb"]["status"], "no formulas")
+        self.assertEqual(status["lesson.ipynb"]["status"], "rendered")
+        self.assertEqual(status["lesson.ipynb"]["formulas"], 4)
+        key = svg.svg_cache_key("\\left\\| x \\right\\| = 2", "mathtext")
+        self.assertTrue(os.path.exists(os.path.join(self.cache, "svg", key[:2], f"{key}.svg")))
+        self.assertEqual(len(lines), 3)
+
+        results = prerender.prerender([self.course], cache_dir=self.cache, backend="mathtext", report=lines.append)
+        self.assertEqual({r["status"] for r in results}, {"no formulas", "unchanged"})
+
+        write_notebook(self.lesson, "from ipy_course_tools import norm", "norm('y', x_latex=True, display=True)", "1/0")
+        results = prerender.prerender([self.course], cache_dir=self.cache, backend="mathtext", jobs=1, report=lines.append)
+        status = {os.path.basename(r["path"]): r for r in results}
+        self.assertEqual((status["lesson.ipynb"]["status"], status["lesson.ipynb"]["failed_cells"]), ("failed", 1))
+
+    @unittest.skipUnless(HAS_MATPLOTLIB, "matplotlib is not installed")
+    def test_notebook_settings(self):
+        """ check formulas are cached with the settings the notebook chooses, and matrices do not fail """
+        compact = os.path.join(self.course, "compact.ipynb")
+        write_notebook(
+            compact,
+            "import ipy_course_tools as ict\nfrom sympy import Matrix\nict.set_compact()",
+            "ict.norm('x', formula='1', x_latex=True, formula_latex=True, display=True)",
+            "ict.show_matrix('A', Matrix([[1, 2], [3, 4]]), display=True)",
+        )
+        results = prerender.prerender([compact], cache_dir=self.cache, backend="mathtext", jobs=1, report=lambda line: None)
+        self.assertEqual((results[0]["status"], results[0]["formulas"]), ("rendered", 2))
+
+        latex = Renderer(compact=True).norm("x", formula="1", x_latex=True, formula_latex=True)
+        key = svg.svg_cache_key(latex, "mathtext")
+        self.assertTrue(os.path.exists(os.path.join(self.cache, "svg", key[:2], f"{key}.svg")))
+        self.assertEqual(len(os.listdir(os.path.join(self.cache, "svg"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
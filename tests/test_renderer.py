@@ -0,0 +1,82 @@
+import threading
+import unittest
+from unittest import mock
+
+from sympy import Matrix, Rational, Symbol
+
+from ipy_course_tools import formula, renderer
+from ipy_course_tools.renderer import Renderer, default_renderer, get_renderer, use_renderer
+
+x = Symbol("x")
+
+
+class RendererTestCase(unittest.TestCase):
+    """ Renderer tests """
+
+    def test_settings(self):
+        """ check printer settings are per instance """
+        matrix = Matrix([[1, 2]])
+        self.assertEqual(Renderer(mat_delim="(").eval_formula(matrix), "\\left(\\begin{matrix}1 & 2\\end{matrix}\\right)")
+        self.assertEqual(Renderer().eval_formula(matrix), "\\left[\\begin{matrix}1 & 2\\end{matrix}\\right]")
+        self.assertEqual(Renderer(fold_short_frac=True).eval_formula(x / 2), "x / 2")
+        with self.assertRaises(TypeError):
+            Renderer(no_such_setting=True)
+
+    def test_cache_and_stats(self):
+        """ check repeated renders hit the cache and are counted """
+        renderer = Renderer()
+        for _ in range(3):
+            renderer.show_matrix("A", Matrix([[1, Rational(1, 2)]]))
+        stats = renderer.stats()
+        self.assertEqual(stats["cache_misses"], 1)
+        self.assertEqual(stats["cache_hits"], 2)
+        self.assertEqual(stats["renders"], 3)
+        self.assertEqual(stats["cache_size"], 1)
+        # 1 and 1.0 compare equal but render differently
+        self.assertNotEqual(renderer.latex(1), renderer.latex(1.0))
+        self.assertEqual(renderer.show_formula("p", (1, 2)), "p = \\left( 1, \\  2\\right)")
+        self.assertEqual(renderer.show_formula("q", (1.0, 2.0)), "q = \\left( 1.0, \\  2.0\\right)")
+        renderer.reset_stats()
+        renderer.clear_cache()
+        self.assertEqual(renderer.stats()["cache_size"], 0)
+        self.assertEqual(renderer.stats()["cache_hits"], 0)
+
+    def test_nested_renders(self):
+        """ check helpers built from other helpers count and compact their output once """
+        compact = Renderer(compact=True)
+        with mock.patch.object(renderer, "compact_latex", wraps=renderer.compact_latex) as compact_latex:
+            compact.linear_combination([1, 2, x], [Matrix([1, 2]), Matrix([3, 4]), Matrix([x, 0])], Matrix([1, 1]))
+            compact.show_eigenvects("v", Matrix([[2, 0], [0, 3]]).eigenvects(), display=False)
+        self.assertEqual(compact_latex.call_count, 2)
+        self.assertEqual(compact.stats()["renders"], 2)
+
+    def test_use_renderer(self):
+        """ check module-level helpers follow the active renderer """
+        self.assertIs(get_renderer(), default_renderer)
+        with use_renderer(Renderer(mat_delim="(")):
+            self.assertTrue(formula.show_matrix("A", Matrix([1])).startswith("A = \\left(\\begin{matrix}"))
+        self.assertTrue(formula.show_matrix("A", Matrix([1])).startswith("A = \\left[\\begin{matrix}"))
+        self.assertIn("Args:", formula.norm.__doc__)
+
+    def test_concurrent(self):
+        """ check renderers with different settings do not interfere across threads """
+        renderers = {"(": Renderer(mat_delim="("), "[": Renderer(mat_delim="[")}
+        failures = []
+
+        def work(delim):
+            with use_renderer(renderers[delim]):
+                for i in range(200):
+                    text = formula.show_matrix("A", Matrix([[i, x]]))
+                    if not text.startswith(f"A = \\left{delim}"):
+                        failures.append(text)
+
+        threads = [threading.Thread(target=work, args=(d,)) for d in "([(["]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from ipy_course_tools import serve
+
+
+class ServeTestCase(unittest.TestCase):
+    """ Render service tests """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = serve.RenderService(workers=1)
+        cls.service.warm_up()
+        cls.server = serve.make_server(cls.service, port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.shutdown()
+
+    def request(self, method, path, payload=None):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2], timeout=30)
+        body = None if payload is None else json.dumps(payload)
+        connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        result = response.status, json.loads(response.read())
+        connection.close()
+        return result
+
+    def test_render(self):
+        """ check specs are rendered once and then served from the cache """
+        spec = {"helper": "show_matrix", "args": ["A", {"matrix": [[1, "x/2"]]}], "kwargs": {"formula_align": True}}
+        status, first = self.request("POST", "/render", spec)
+        self.assertEqual(status, 200)
+        self.assertEqual(first["latex"], "A &= \\left[\\begin{matrix}1 & \\frac{x}{2}\\end{matrix}\\right]")
+        status, second = self.request("POST", "/render", spec)
+        self.assertEqual((status, second["source"], second["latex"]), (200, "cache", first["latex"]))
+
+    def test_settings(self):
+        """ check renderer settings are applied per spec """
+        spec = {"helper": "norm", "args": [{"expr": "x**2"}], "settings": {"compact": True}}
+        status, result = self.request("POST", "/render", spec)
+        self.assertEqual((status, result["latex"]), (200, "\\left\\|x^2\\right\\|"))
+
+    def test_errors(self):
+        """ check invalid requests are rejected """
+        self.assertEqual(self.request("POST", "/render", {"helper": "__init__"})[0], 400)
+        self.assertEqual(self.request("POST", "/render", ["not", "a", "spec"])[0], 400)
+        self.assertEqual(self.request("GET", "/nothing")[0], 404)
+
+    def test_untrusted_specs(self):
+        """ check spec values are never evaluated as Python code """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "pwned")
+            command = f"__import__('os').system('touch {path}')"
+            for spec in (
+                {"helper": "eval_formula", "args": [{"expr": command}]},
+                {"helper": "show_matrix", "args": ["A", {"matrix": [[command]]}]},
+            ):
+                status, result = self.request("POST", "/render", spec)
+                self.assertEqual(status, 400)
+                self.assertIn("SympifyError", result["error"])
+            self.assertFalse(os.path.exists(path))
+
+    def test_timeout(self):
+        """ check renders that take too long are stopped in the worker """
+        service = serve.RenderService(workers=1, timeout=1.0)
+        try:
+            service.warm_up()
+            for expr in ("factorial(3*10**6)", "factorial(factorial(20))"):
+                with self.assertRaises(TimeoutError):
+                    service.render({"helper": "eval_formula", "args": [{"expr": expr}]})
+            # the worker is free again right away
+            self.assertEqual(service.render({"helper": "eval_formula", "args": [{"expr": "x"}]}), ("x", "worker"))
+            self.assertEqual(service.metrics()["errors"], 2)
+        finally:
+            service.shutdown()
+
+    def test_worker_renderers(self):
+        """ check workers keep a bounded number of renderers """
+        for size in range(serve.WORKER_RENDERERS + 4):
+            serve.render_spec({"helper": "eval_formula", "args": [{"expr": "x"}], "settings": {"cache_size": size}})
+        self.assertEqual(len(serve._worker_renderers), serve.WORKER_RENDERERS)
+
+    def test_coalescing(self):
+        """ check concurrent identical requests are rendered by a single worker call """
+        spec = {"helper": "show_row_reduction", "args": [{"matrix": [[2, 1, 3], [4, 1, 0], [1, 5, 7]]}]}
+        before = self.service.metrics()["worker_renders"]
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.service.render(spec))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({latex for latex, _ in results}), 1)
+        self.assertEqual(self.service.metrics()["worker_renders"], before + 1)
+
+    def test_metrics(self):
+        """ check the metrics endpoint """
+        self.request("POST", "/render", {"helper": "eval_formula", "args": [{"expr": "y"}]})
+        status, metrics = self.request("GET", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertGreaterEqual(metrics["requests"], 1)
+        self.assertIn("p95", metrics["latency_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from IPython.display import Math
+from sympy import Matrix
+
+from ipy_course_tools import formula, svg
+
+HAS_MATPLOTLIB = importlib.util.find_spec("matplotlib") is not None
+
+
+class SvgTestCase(unittest.TestCase):
+    """ SVG pre-rendering tests """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(formula.set_output_mode, "math")
+
+    def test_cache_key(self):
+        """ check cache keys address the formula and the backend """
+        key = svg.svg_cache_key("x^{2}", "latex")
+        self.assertEqual(key, svg.svg_cache_key("x^{2}", "latex"))
+        self.assertNotEqual(key, svg.svg_cache_key("x^{3}", "latex"))
+        self.assertNotEqual(key, svg.svg_cache_key("x^{2}", "mathtext"))
+
+    def test_cache_reuse(self):
+        """ check a formula is only rendered once """
+        with mock.patch.object(svg, "_render_mathtext", return_value="<svg/>") as render:
+            for _ in range(3):
+                self.assertEqual(svg.render_svg("x", backend="mathtext", cache_dir=self.tmp.name), "<svg/>")
+        self.assertEqual(render.call_count, 1)
+        key = svg.svg_cache_key("x", "mathtext")
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "svg", key[:2], f"{key}.svg")))
+
+    @unittest.skipUnless(HAS_MATPLOTLIB, "matplotlib is not installed")
+    def test_output_mode(self):
+        """ check helpers embed an SVG image in svg output mode """
+        formula.set_output_mode("svg", backend="mathtext", cache_dir=self.tmp.name)
+        rendered = formula.norm("x", formula="1", x_latex=True, formula_latex=True, display=True)
+        self.assertTrue(rendered.data.startswith('<img src="data:image/svg+xml;base64,'))
+        self.assertIsInstance(formula.norm("x", x_latex=True), str)
+
+    def test_unsupported_formulas(self):
+        """ check formulas the backend cannot typeset fall back to MathJax and are not cached """
+        formula.set_output_mode("svg", backend="mathtext", cache_dir=self.tmp.name)
+        matrix = formula.show_matrix("A", Matrix([[1, 2], [3, 4]]), display=True)
+        self.assertIsInstance(matrix, Math)
+        self.assertEqual(matrix.data, formula.show_matrix("A", Matrix([[1, 2], [3, 4]])))
+        aligned = formula.eqn_align(["a &= 1", "b &= 2"], display=True)
+        self.assertIsInstance(aligned, Math)
+        reduction = formula.show_row_reduction(Matrix([[0, 1], [1, 0]]), display=True)
+        self.assertIsInstance(reduction, Math)
+        with self.assertRaises(svg.SVGRenderError):
+            svg.render_svg("\\begin{align} a \\end{align}", backend="mathtext", cache_dir=self.tmp.name)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "svg")))
+
+    @unittest.skipUnless(HAS_MATPLOTLIB, "matplotlib is not installed")
+    def test_mathtext_errors(self):
+        """ check formulas mathtext cannot parse fall back to MathJax """
+        formula.set_output_mode("svg", backend="mathtext", cache_dir=self.tmp.name)
+        rendered = formula.norm("\\unknowncommand x", x_latex=True, display=True)
+        self.assertIsInstance(rendered, Math)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "svg")))
+
+    def test_missing_matplotlib(self):
+        """ check the mathtext backend falls back to MathJax without matplotlib """
+        formula.set_output_mode("svg", backend="mathtext", cache_dir=self.tmp.name)
+        with mock.patch.dict(sys.modules, {"matplotlib": None, "matplotlib.mathtext": None}):
+            with self.assertRaises(svg.SVGRenderError):
+                svg.render_svg("x", backend="mathtext", cache_dir=self.tmp.name)
+            rendered = formula.norm("x", x_latex=True, display=True)
+        self.assertIsInstance(rendered, Math)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "svg")))
+
+    def test_invalid_mode(self):
+        """ check unknown modes and backends are rejected """
+        with self.assertRaises(ValueError):
+            formula.set_output_mode("png")
+        with self.assertRaises(ValueError):
+            formula.set_output_mode("svg", backend="mathjax")
+
+
+if __name__ == "__main__":
+    unittest.main()